@@ -2,19 +2,43 @@
 """
 Goodreads shelf scraper - exports all books from public shelves to JSON using public RSS feeds
 """
-import requests
+import os
+import re
+import io
 import json
 import time
 import sys
+import html
+import gzip
+import argparse
+import threading
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+import xml.etree.ElementTree as ET
 from email.utils import parsedate_to_datetime
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 
-# Suppress BeautifulSoup's XML-parsed-as-HTML warnings since we use html.parser for standard library compatibility
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.startup import lazy_import
+
+requests = lazy_import("requests")
+bs4 = lazy_import("bs4")
 
 USER_ID = "76529348"
 BASE_URL = f"https://www.goodreads.com/review/list_rss/{USER_ID}"
+SHELVES = ['read', 'currently-reading', 'to-read']
+# Fields that change without any action on our side; they don't count as a change in incremental mode
+VOLATILE_FIELDS = ('avg_rating',)
+PAGE_SIZE = 100  # items per RSS page; a shorter page is the last one
+MAX_PAGES = 100  # safe upper limit per shelf to prevent any potential infinite loops
+# Shared by all shelves; the same politeness as the old 2 s pause between pages
+REQUESTS_PER_SECOND = 0.5
+# Backup formats: one indented JSON document, or JSON Lines (a header line, then one book per line)
+FORMATS = ('json', 'ndjson')
+# RSS parser: 'etree' streams each page in one pass, 'bs4' is the original BeautifulSoup parser
+PARSERS = ('etree', 'bs4')
+PARSER = os.environ.get('GOODREADS_PARSER', 'etree')
+# First link in an item's description, which points at the book's slugged page
+HREF_RE = re.compile(r"""<a\s[^>]*?\bhref\s*=\s*(["'])(.*?)\1""", re.IGNORECASE | re.DOTALL)
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
@@ -39,7 +63,14 @@ def format_date(date_str):
     except Exception:
         return "not set"
 
-def fetch_shelf(shelf_name, page=1):
+def make_session():
+    """One keep-alive session for the whole crawl, with a connection per shelf"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=len(SHELVES))
+    session.mount("https://", adapter)
+    return session
+
+def fetch_shelf(shelf_name, page=1, session=None):
     """Fetch a page from a specific shelf RSS feed"""
     params = {
         'shelf': shelf_name,
@@ -47,18 +78,100 @@ def fetch_shelf(shelf_name, page=1):
     }
     
     try:
-        resp = requests.get(BASE_URL, params=params, headers=HEADERS, timeout=30)
+        resp = (session or requests).get(BASE_URL, params=params, headers=HEADERS, timeout=30)
         resp.raise_for_status()
         return resp.text
     except Exception as e:
         print(f"Error fetching {shelf_name} page {page}: {e}", file=sys.stderr)
         return None
 
-def parse_books(xml_content, main_shelf):
-    """Parse book data from RSS XML"""
+def parse_books(xml_content, main_shelf, parser=None):
+    """Parse book data from RSS XML with the configured parser"""
     if not xml_content:
         return []
-    soup = BeautifulSoup(xml_content, 'html.parser')
+    if (parser or PARSER) == 'bs4':
+        return parse_books_bs4(xml_content, main_shelf)
+    try:
+        return parse_books_etree(xml_content, main_shelf)
+    except ET.ParseError as e:
+        # BeautifulSoup copes with feeds that are not well-formed XML
+        print(f"RSS is not well-formed ({e}), falling back to BeautifulSoup", file=sys.stderr)
+        return parse_books_bs4(xml_content, main_shelf)
+
+def book_from_item(item, main_shelf):
+    """Book record from an RSS <item> element, built in one pass over its children"""
+    text = {}
+    book_attr_id = ""
+    num_pages = ""
+    for child in item:
+        tag = child.tag
+        if tag == 'book':
+            book_attr_id = child.get('id', '')
+            pages_el = child.find('num_pages')
+            if pages_el is not None:
+                num_pages = pages_el.text or ""
+        elif tag not in text:
+            # Like BeautifulSoup's .text, include the text of any nested markup
+            text[tag] = "".join(child.itertext()) if len(child) else (child.text or "")
+
+    book_id = clean_cdata(text.get('book_id')) or book_attr_id
+    if not book_id:
+        return None
+
+    url = f"https://www.goodreads.com/book/show/{book_id}"
+    match = HREF_RE.search(text.get('description', ""))
+    if match and match.group(2):
+        url = html.unescape(match.group(2)).split('?')[0]
+
+    try:
+        rating = int(text.get('user_rating', "").strip())
+    except ValueError:
+        rating = 0
+
+    shelves = [clean_cdata(s) for s in text.get('user_shelves', "").split(',') if s.strip()]
+    if main_shelf not in shelves:
+        shelves.append(main_shelf)
+
+    return {
+        'id': book_id,
+        'title': clean_cdata(text.get('title')),
+        'url': url,
+        'author': clean_cdata(text.get('author_name')),
+        'isbn': clean_cdata(text.get('isbn')),
+        'rating': rating,
+        'shelves': shelves,
+        'date_read': format_date(text.get('user_read_at', "")),
+        'date_added': format_date(text.get('user_date_added', "")),
+        'avg_rating': clean_cdata(text.get('average_rating')),
+        'pages': f"{clean_cdata(num_pages)}\n        pp" if num_pages.strip() else "not set",
+        'review': clean_cdata(text.get('user_review')),
+    }
+
+def parse_books_etree(xml_content, main_shelf):
+    """Parse book data from RSS XML with ElementTree, streaming item by item"""
+    if isinstance(xml_content, str):
+        xml_content = xml_content.encode('utf-8')
+    books = []
+    for _, element in ET.iterparse(io.BytesIO(xml_content), events=('end',)):
+        if element.tag != 'item':
+            continue
+        try:
+            book = book_from_item(element, main_shelf)
+            if book and book['title']:
+                books.append(book)
+        except Exception as e:
+            print(f"Error parsing book: {e}", file=sys.stderr)
+        # Drop the item's subtree, the page is never held as a whole tree
+        element.clear()
+    return books
+
+def parse_books_bs4(xml_content, main_shelf):
+    """Parse book data from RSS XML with BeautifulSoup (the original parser, kept for parity checks)"""
+    if not xml_content:
+        return []
+    # Suppress BeautifulSoup's XML-parsed-as-HTML warnings since we use html.parser for standard library compatibility
+    warnings.filterwarnings("ignore", category=bs4.XMLParsedAsHTMLWarning)
+    soup = bs4.BeautifulSoup(xml_content, 'html.parser')
     items = soup.find_all('item')
     books = []
     
@@ -90,7 +203,7 @@ def parse_books(xml_content, main_shelf):
             # Try to extract the full slugged URL from description if available
             desc_tag = item.find('description')
             if desc_tag:
-                desc_soup = BeautifulSoup(desc_tag.text, 'html.parser')
+                desc_soup = bs4.BeautifulSoup(desc_tag.text, 'html.parser')
                 link_tag = desc_soup.find('a')
                 if link_tag and link_tag.get('href'):
                     href = link_tag.get('href')
@@ -158,65 +271,288 @@ def parse_books(xml_content, main_shelf):
             
     return books
 
-def scrape_all_shelves():
-    """Scrape all shelves using RSS pagination"""
-    shelves = ['read', 'currently-reading', 'to-read']
-    all_books = []
-    
-    # Track book IDs to avoid duplicating books that might belong to multiple shelves
-    seen_ids = set()
-    
-    for shelf in shelves:
-        print(f"Scraping {shelf}...", file=sys.stderr)
+def backup_format(path):
+    """(format, gzipped) of a backup file from its name: .ndjson or .jsonl for JSON Lines, then .gz for gzip"""
+    name = path.lower()
+    gzipped = name.endswith('.gz')
+    if gzipped:
+        name = name[:-3]
+    return ('ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'json'), gzipped
+
+def open_backup(path, mode, gzipped):
+    if gzipped:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def load_backup(path):
+    """Books of a previous backup in any of the formats, or None if there is no usable one"""
+    fmt, gzipped = backup_format(path)
+    try:
+        with open_backup(path, 'r', gzipped) as f:
+            if fmt == 'ndjson':
+                # Every line but the header is a book
+                return [record for record in map(json.loads, filter(str.strip, f)) if 'id' in record]
+            return json.load(f)['books']
+    except FileNotFoundError:
+        print(f"No previous backup at {path}, doing a full crawl", file=sys.stderr)
+    except (OSError, EOFError, ValueError, KeyError, TypeError) as e:
+        print(f"Could not read previous backup {path} ({e}), doing a full crawl", file=sys.stderr)
+    return None
+
+def main_shelf_of(book):
+    """The exclusive shelf (read, currently-reading or to-read) a book is on, if any"""
+    return next((s for s in SHELVES if s in book.get('shelves', [])), None)
+
+def is_unchanged(book, known):
+    """True if a freshly parsed book matches its previous record, ignoring shelf order and volatile fields"""
+    if not known:
+        return False
+    for key, value in book.items():
+        if key == 'shelves':
+            if set(value) != set(known.get('shelves', [])):
+                return False
+        elif key not in VOLATILE_FIELDS and known.get(key) != value:
+            return False
+    return True
+
+class Library:
+    """Books keyed by id in first-seen order, with a shelf set per book for O(1) merges"""
+
+    def __init__(self):
+        self.books = {}
+        self._shelves = {}
+
+    def add(self, book):
+        """Add a book, or merge its shelves into the record already seen; returns True if it was new"""
+        existing = self.books.get(book['id'])
+        if existing is None:
+            self.books[book['id']] = book
+            self._shelves[book['id']] = set(book['shelves'])
+            return True
+        # Seen before, e.g. on another shelf: keep one record listing all its shelves
+        shelves = self._shelves[book['id']]
+        for s in book['shelves']:
+            if s not in shelves:
+                shelves.add(s)
+                existing['shelves'].append(s)
+        return False
+
+    def __contains__(self, book_id):
+        return book_id in self.books
+
+    def __len__(self):
+        return len(self.books)
+
+    def to_list(self):
+        return list(self.books.values())
+
+def merge_previous(crawled, library, previous):
+    """Crawled books of each shelf, each followed by the previous backup's books of that shelf that were not re-crawled"""
+    remaining = {shelf: [] for shelf in SHELVES + [None]}
+    for book in previous:
+        if book['id'] not in library:
+            remaining[main_shelf_of(book)].append(book)
+
+    merged = Library()
+    for shelf in SHELVES:
+        for book in crawled[shelf] + remaining[shelf]:
+            merged.add(book)
+    for book in remaining[None]:
+        merged.add(book)
+    return merged
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second on average, bursts of at most `capacity`.
+
+    Tokens are reserved up front (the count may go negative), so waiting
+    callers are served in order and each sleeps only until its own slot.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+class ShelfCrawler:
+    """Crawls shelves in parallel over one session, fetching each shelf's next page while the current one is parsed.
+
+    Every request takes a token from one shared bucket, so Goodreads sees the
+    same request rate however many shelves are in flight.
+    """
+
+    def __init__(self, session, limiter, parser=None, known=None):
+        self.session = session
+        self.limiter = limiter
+        self.parser = parser
+        # Books of the previous backup by id in incremental mode, None for a full crawl
+        self.known = known
+        self.fetches = ThreadPoolExecutor(max_workers=len(SHELVES), thread_name_prefix="fetch")
+        self._print_lock = threading.Lock()
+
+    def log(self, message):
+        # Shelves report concurrently, keep their lines whole
+        with self._print_lock:
+            print(message, file=sys.stderr)
+
+    def _fetch(self, shelf, page, cancelled):
+        self.limiter.acquire()
+        # The shelf ended while this prefetch waited for its turn
+        if cancelled.is_set():
+            return None
+        return fetch_shelf(shelf, page, self.session)
+
+    def fetch(self, shelf, page):
+        cancelled = threading.Event()
+        return self.fetches.submit(self._fetch, shelf, page, cancelled), cancelled
+
+    def crawl(self, shelf):
+        """Parsed pages of one shelf, in page order"""
+        pages = []
         page = 1
-        
-        while page <= 100:  # Safe upper limit to prevent any potential infinite loops
-            xml_content = fetch_shelf(shelf, page)
+        pending = self.fetch(shelf, page)
+        while pending:
+            xml_content = pending[0].result()
+            pending = None
             if not xml_content:
                 break
-            
-            books = parse_books(xml_content, shelf)
-            if not books:
-                break
-            
-            new_books_count = 0
-            for book in books:
-                if book['id'] not in seen_ids:
-                    seen_ids.add(book['id'])
-                    all_books.append(book)
-                    new_books_count += 1
-                else:
-                    # If we've already seen this book, it could be on multiple shelves (e.g. read and a custom shelf).
-                    # Let's find it and merge the shelf lists to make sure it lists all shelves!
-                    for existing_book in all_books:
-                        if existing_book['id'] == book['id']:
-                            for s in book['shelves']:
-                                if s not in existing_book['shelves']:
-                                    existing_book['shelves'].append(s)
-                            break
-            
-            print(f"  Page {page}: parsed {len(books)} books ({new_books_count} new)", file=sys.stderr)
-            
+
+            # A full page means there may be another one, so start fetching it before parsing this one
+            if page < MAX_PAGES and xml_content.count('<item>') >= PAGE_SIZE:
+                pending = self.fetch(shelf, page + 1)
+
+            books = parse_books(xml_content, shelf, self.parser)
+            if books:
+                pages.append(books)
+                self.log(f"  {shelf} page {page}: parsed {len(books)} books")
+
             # If the page has fewer than 100 items, we have reached the end of the shelf
-            if len(books) < 100:
-                break
-                
+            done = len(books) < PAGE_SIZE
+            # Shelves are ordered by date added, so everything after an unchanged page is known too
+            if not done and self.known is not None and all(is_unchanged(b, self.known.get(b['id'])) for b in books):
+                self.log(f"  {shelf} page {page} has no changes, taking the rest of {shelf} from the previous backup")
+                done = True
+            if done and pending:
+                pending[0].cancel()
+                pending[1].set()
+                pending = None
             page += 1
-            time.sleep(2)  # Respectful rate limiting
-            
-    return all_books
+        return pages
 
-if __name__ == '__main__':
-    print("Starting Goodreads scraper (RSS Mode)...", file=sys.stderr)
-    books = scrape_all_shelves()
+    def crawl_all(self, shelves):
+        """{shelf: parsed pages}, crawling every shelf at once"""
+        try:
+            with ThreadPoolExecutor(max_workers=len(shelves), thread_name_prefix="shelf") as pool:
+                futures = {shelf: pool.submit(self.crawl, shelf) for shelf in shelves}
+                return {shelf: future.result() for shelf, future in futures.items()}
+        finally:
+            self.fetches.shutdown(wait=False, cancel_futures=True)
+
+def scrape_all_shelves(previous=None, parser=None):
+    """Scrape all shelves using RSS pagination.
+
+    Shelves are crawled in parallel under one shared rate limit, and merged
+    in SHELVES order once all are in, so the output doesn't depend on which
+    shelf finished first.
+
+    With the books of a previous backup, each shelf is only walked (newest
+    first) until a page without any new or changed book, and the rest is
+    taken from the previous backup. Books removed from Goodreads are only
+    dropped by a full crawl.
+    """
+    known = {book['id']: book for book in previous} if previous is not None else None
+    print(f"Scraping {', '.join(SHELVES)}...", file=sys.stderr)
+    crawler = ShelfCrawler(make_session(), TokenBucket(REQUESTS_PER_SECOND), parser, known)
+    pages = crawler.crawl_all(SHELVES)
+
+    crawled = {shelf: [] for shelf in SHELVES}
+    library = Library()
+    for shelf in SHELVES:
+        parsed = 0
+        for books in pages[shelf]:
+            parsed += len(books)
+            for book in books:
+                # A book already seen on another shelf only has its shelves merged
+                if library.add(book):
+                    crawled[shelf].append(book)
+        print(f"  {shelf}: {parsed} books ({len(crawled[shelf])} new)", file=sys.stderr)
+
+    if previous is not None:
+        library = merge_previous(crawled, library, previous)
+    return library.to_list()
+
+def backup_chunks(meta, books, fmt='json'):
+    """The backup as text, one book at a time, so the whole library is never serialized in one string.
+
+    The json format is byte for byte what json.dump(..., indent=2) writes
+    for meta with the books appended.
+    """
+    if fmt == 'ndjson':
+        yield json.dumps(meta, ensure_ascii=False) + "\n"
+        for book in books:
+            yield json.dumps(book, ensure_ascii=False) + "\n"
+        return
+
+    yield "{\n" + "".join(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n"
+                          for key, value in meta.items()) + '  "books": ['
+    separator = "\n    "
+    for book in books:
+        yield separator + json.dumps(book, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+        separator = ",\n    "
+    # An empty list stays "[]", like json.dump writes it
+    yield ("]" if separator == "\n    " else "\n  ]") + "\n}\n"
+
+def write_backup(meta, books, path=None, fmt=None):
+    """Stream the backup to stdout, or to path via a temporary file and rename, so a failed run never leaves a truncated file"""
+    if path is None:
+        sys.stdout.writelines(backup_chunks(meta, books, fmt or 'json'))
+        return
+    default_fmt, gzipped = backup_format(path)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open_backup(tmp_path, 'w', gzipped) as f:
+            f.writelines(backup_chunks(meta, books, fmt or default_fmt))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def main():
+    parser = argparse.ArgumentParser(description="Export public Goodreads shelves to JSON")
+    parser.add_argument('--output', '-o', metavar='PATH',
+                        help="write the backup to PATH instead of stdout (gzipped if PATH ends in .gz)")
+    parser.add_argument('--format', choices=FORMATS,
+                        help="backup format (default: from the --output name, .ndjson or .jsonl for JSON Lines, else json)")
+    parser.add_argument('--incremental', metavar='BACKUP',
+                        help="update a previous backup, only fetching pages until nothing has changed")
+    parser.add_argument('--parser', choices=PARSERS, default=PARSER,
+                        help="RSS parser (default: %(default)s, or GOODREADS_PARSER)")
+    args = parser.parse_args()
+
+    previous = load_backup(args.incremental) if args.incremental else None
+    mode = "incremental" if previous is not None else "full"
+    print(f"Starting Goodreads scraper (RSS Mode, {mode})...", file=sys.stderr)
+    books = scrape_all_shelves(previous, args.parser)
     
-    # Output JSON to stdout
-    result = {
+    meta = {
         'user_id': USER_ID,
         'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime()),
         'total_books': len(books),
-        'books': books
     }
-    
-    print(json.dumps(result, indent=2, ensure_ascii=False))
-    print(f"\nTotal unique books scraped: {len(books)}", file=sys.stderr)
\ No newline at end of file
+    write_backup(meta, books, args.output, args.format)
+    print(f"\nTotal unique books scraped: {len(books)}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -4,14 +4,19 @@ IMDB lists-only scraper
 For ratings/watchlist: manually export CSV from IMDB once, commit to repo
 This script only scrapes custom lists (fast, no rate limit issues)
 """
-import requests
-from bs4 import BeautifulSoup
+import os
 import json
 import time
 import sys
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.startup import lazy_import
+
+requests = lazy_import("requests")
+bs4 = lazy_import("bs4")
+
 USER_ID = "ur48993532"
 BASE_URL = "https://www.imdb.com"
 HEADERS = {
@@ -54,7 +59,7 @@ def scrape_single_list(list_id, list_name):
         if not html:
             break
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = bs4.BeautifulSoup(html, 'html.parser')
         cards = soup.find_all('li', class_=re.compile('ipc-metadata-list-summary-item'))
         
         if not cards:
@@ -126,7 +131,7 @@ def scrape_custom_lists():
         print("ERROR: Could not fetch lists page", file=sys.stderr)
         return lists
     
-    soup = BeautifulSoup(html, 'html.parser')
+    soup = bs4.BeautifulSoup(html, 'html.parser')
     list_containers = soup.find_all('div', class_=re.compile('ipc-metadata-list-summary-item'))
     
     list_tasks = []
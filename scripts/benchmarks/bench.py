@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Benchmark and replay harness for the weather and outage pipelines.
+
+Recorded METAR JSON, Open-Meteo JSON and a rendered outage page (fixtures/)
+are replayed through the hot paths of meteo.py and power.py. A local HTTP
+server stands in for aviationweather.gov, Open-Meteo and ScraperAPI, so the
+full fetch -> parse -> render path can be timed without touching the real
+APIs or spending proxy credits:
+
+    python3 scripts/benchmarks/bench.py                 # everything
+    python3 scripts/benchmarks/bench.py -k metar -n 2000
+    python3 scripts/benchmarks/bench.py --compare       # vs. the last run at another commit
+
+Every run appends one JSON line per benchmark (tagged with the git commit)
+to the results file, so throughput and latency percentiles can be tracked
+across commits.
+"""
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+DEFAULT_RESULTS_FILE = os.path.join(BENCH_DIR, ".cache", "results.jsonl")
+
+# Keep the scripts away from their real caches, history and credentials; removed again at exit
+_tmp_dir = tempfile.TemporaryDirectory(prefix="bench-")
+atexit.register(_tmp_dir.cleanup)
+_tmp = _tmp_dir.name
+os.environ.update({
+    "METEO_CACHE_FILE": "",
+    "METEO_HISTORY_DB": "",
+    "HISTORY_DB": "",
+    "SCHEDULE_CACHE_FILE": os.path.join(_tmp, "schedule_cache.json"),
+    "SCHEDULE_CACHE_TTL": "0",
+    "PROXY_TIER_STATS_FILE": os.path.join(_tmp, "proxy_tiers.json"),
+    "SCRAPER_API_KEY": "bench",
+    "ZENROWS_API_KEY": "",
+})
+for directory in ("meteo_data", "light_outage"):
+    sys.path.insert(0, os.path.join(SCRIPTS_DIR, directory))
+
+import meteo  # noqa: E402
+import power  # noqa: E402
+from schedule_parser import available_backends, parse_periods  # noqa: E402
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+METARS = json.loads(load_fixture("metar.json"))
+FORECAST = json.loads(load_fixture("open_meteo.json"))
+OUTAGE_PAGE = load_fixture("outage_page.html")
+
+LOCATIONS = [
+    {"name": report["name"].split(",")[0], "lat": report["lat"], "lon": report["lon"], "icao": report["icaoId"]}
+    for report in METARS
+]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the fixtures the way the real APIs shape their responses"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/metar":
+            ids = set(query.get("ids", [""])[0].split(","))
+            self.reply([r for r in METARS if r["icaoId"] in ids])
+        elif url.path == "/forecast":
+            count = len(query.get("latitude", [""])[0].split(","))
+            self.reply(FORECAST if count == 1 else [FORECAST] * count)
+        elif url.path == "/scraperapi":
+            self.reply(OUTAGE_PAGE, "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def reply(self, body, content_type="application/json"):
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def stand_in_server():
+    """Point meteo and power at a local server serving the fixtures"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    saved = (meteo.METAR_API_URL, meteo.OPEN_METEO_API_URL, power.SCRAPER_API_URL)
+    meteo.METAR_API_URL, meteo.OPEN_METEO_API_URL = f"{base}/metar", f"{base}/forecast"
+    power.SCRAPER_API_URL = f"{base}/scraperapi"
+    try:
+        yield base
+    finally:
+        meteo.METAR_API_URL, meteo.OPEN_METEO_API_URL, power.SCRAPER_API_URL = saved
+        server.shutdown()
+        server.server_close()
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    total = sum(timings)
+    return {
+        "n": iterations,
+        "mean_us": round(total / iterations / 1000, 2),
+        "p50_us": round(percentile(timings, 0.50) / 1000, 2),
+        "p90_us": round(percentile(timings, 0.90) / 1000, 2),
+        "p99_us": round(percentile(timings, 0.99) / 1000, 2),
+        "ops_s": round(iterations / (total / 1e9), 1),
+    }
+
+
+def benchmarks():
+    """name -> (callable, relative cost); costly benchmarks run fewer iterations"""
+    now = power.get_timezone().localize(power.datetime(2026, 10, 17, 12, 0))
+    periods = parse_periods(OUTAGE_PAGE)
+    raw_metars = [r["rawOb"] for r in METARS]
+
+    def outages_report():
+        outages = {name: power.OutageTimeline(power.build_outages(periods, now)) for name in ("Дім", "Дача")}
+        return power.build_message(outages, now).render("html")
+
+    def fetch_meteo():
+        results = meteo.fetch_sources({
+            "METAR": lambda timeout: meteo.get_metar_batch([loc["icao"] for loc in LOCATIONS], timeout),
+            "Open-Meteo": lambda timeout: meteo.get_open_meteo_batch([(loc["lat"], loc["lon"]) for loc in LOCATIONS],
+                                                                     timeout),
+        })
+        for location, weather in zip(LOCATIONS, results["Open-Meteo"]):
+            meteo.create_message(results["METAR"].get(location["icao"]), weather, location)
+
+    def fetch_power():
+        outages, _ = power.fetch_location({"name": "Дім", "url": "https://example.invalid/schedule"}, now)
+        return power.build_message({"Дім": power.OutageTimeline(outages)}, now).render("html")
+
+    suite = {
+        "meteo.parse_clouds_from_metar": (lambda: [meteo.parse_clouds_from_metar(raw) for raw in raw_metars], 1),
+        "meteo.format_cloud_layers": (lambda: meteo.format_cloud_layers(FORECAST), 1),
+        "meteo.create_message": (lambda: meteo.create_message(METARS[1], FORECAST, LOCATIONS[1]), 10),
+        "power.build_outages+render": (outages_report, 5),
+    }
+    for backend in available_backends():
+        suite[f"power.parse_periods[{backend}]"] = (lambda b=backend: parse_periods(OUTAGE_PAGE, b), 20)
+    suite["e2e.meteo_fetch_render"] = (fetch_meteo, 200)
+    suite["e2e.power_fetch_render"] = (fetch_power, 100)
+    return suite
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", SCRIPTS_DIR], cwd=BENCH_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_results(path, commit):
+    """Latest recorded result per benchmark from a different commit"""
+    latest = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("commit") != commit:
+                    latest[record["name"]] = record
+    except FileNotFoundError:
+        pass
+    return latest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded fixtures through the meteo and power hot paths")
+    parser.add_argument("-k", "--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("-n", "--iterations", type=int, default=1000, help="iterations of the cheapest benchmark")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_FILE, help="JSON lines file to append results to")
+    parser.add_argument("--no-save", action="store_true", help="don't append to the results file")
+    parser.add_argument("--compare", action="store_true", help="show change vs. the last run at another commit")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    previous = previous_results(args.results, commit) if args.compare else {}
+    records = []
+
+    print(f"{'benchmark':<34} {'n':>6} {'p50 µs':>10} {'p90 µs':>10} {'p99 µs':>10} {'ops/s':>10}")
+    with stand_in_server(), contextlib.redirect_stdout(io.StringIO()) as quiet:
+        for name, (fn, cost) in benchmarks().items():
+            if args.filter not in name:
+                continue
+            iterations = max(10, args.iterations // cost)
+            stats = measure(fn, iterations, warmup=max(1, iterations // 10))
+            quiet.truncate(0)
+            quiet.seek(0)
+
+            line = (f"{name:<34} {stats['n']:>6} {stats['p50_us']:>10.1f} {stats['p90_us']:>10.1f} "
+                    f"{stats['p99_us']:>10.1f} {stats['ops_s']:>10.1f}")
+            if name in previous:
+                change = (stats["p50_us"] / previous[name]["p50_us"] - 1) * 100
+                line += f"  {change:+.1f}% p50 vs {previous[name]['commit']}"
+            print(line, file=sys.__stdout__)
+            records.append({"name": name, **stats})
+
+    if records and not args.no_save:
+        meta = {
+            "commit": commit,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "measured_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps({**meta, **record}, ensure_ascii=False) + "\n")
+        print(f"\nSaved {len(records)} result(s) to {args.results}")
+        # Medians across the suite, handy when eyeballing a whole run
+        print(f"Median p50 across benchmarks: {statistics.median(r['p50_us'] for r in records):.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Shelf merge cost of the Goodreads scraper on synthetic libraries.
+
+Every book is parsed once from its exclusive shelf, and a share of them
+shows up again on further pages with custom shelves, which is what makes
+the scraper merge records. The id-indexed goodreads_scraper.Library is
+compared with the previous linear scan over all books:
+
+    python3 scripts/benchmarks/bench_goodreads_merge.py
+    python3 scripts/benchmarks/bench_goodreads_merge.py --sizes 10000 50000 --overlap 0.8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backup_goodreads_web"))
+
+from goodreads_scraper import Library, SHELVES  # noqa: E402
+
+CUSTOM_SHELVES = ["favorites", "sci-fi", "non-fiction", "kindle", "audiobooks", "re-read", "classics", "owned"]
+
+
+def synthetic_pages(size, overlap, seed=42):
+    """Parsed books in crawl order: every book once, then `overlap` of them again with extra shelves"""
+    rng = random.Random(seed)
+    books = [
+        {"id": str(1_000_000 + i), "title": f"Book {i}", "shelves": [rng.choice(SHELVES)]}
+        for i in range(size)
+    ]
+    repeats = [
+        {"id": book["id"], "title": book["title"], "shelves": book["shelves"] + rng.sample(CUSTOM_SHELVES, 2)}
+        for book in rng.sample(books, int(size * overlap))
+    ]
+    return books + repeats
+
+
+def legacy_merge(books):
+    """The original merge: a seen-id set, then a linear scan and list membership tests per repeat"""
+    all_books = []
+    seen_ids = set()
+    for book in books:
+        if book['id'] not in seen_ids:
+            seen_ids.add(book['id'])
+            all_books.append(book)
+        else:
+            for existing_book in all_books:
+                if existing_book['id'] == book['id']:
+                    for s in book['shelves']:
+                        if s not in existing_book['shelves']:
+                            existing_book['shelves'].append(s)
+                    break
+    return all_books
+
+
+def library_merge(books):
+    library = Library()
+    for book in books:
+        library.add(book)
+    return library.to_list()
+
+
+def timed(merge, books):
+    # Fresh copies, since both merges append to the records' shelf lists
+    books = [dict(book, shelves=list(book["shelves"])) for book in books]
+    start = time.perf_counter()
+    result = merge(books)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Goodreads shelf merge")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 25_000, 50_000, 100_000])
+    parser.add_argument("--overlap", type=float, default=0.5, help="share of books seen again on custom shelves")
+    parser.add_argument("--legacy-max", type=int, default=20_000,
+                        help="skip the quadratic merge above this library size")
+    args = parser.parse_args()
+
+    print(f"{'books':>8} {'repeats':>8} {'library':>10} {'legacy':>10} {'speedup':>8}")
+    for size in args.sizes:
+        books = synthetic_pages(size, args.overlap)
+        library_s, merged = timed(library_merge, books)
+        if size <= args.legacy_max:
+            legacy_s, expected = timed(legacy_merge, books)
+            if merged != expected:
+                sys.exit(f"❌ Library merge differs from the legacy merge at {size} books")
+            legacy, speedup = f"{legacy_s:9.3f}s", f"{legacy_s / library_s:7.0f}x"
+        else:
+            legacy, speedup = f"{'skipped':>10}", f"{'-':>8}"
+        print(f"{size:>8} {len(books) - size:>8} {library_s:9.3f}s {legacy} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
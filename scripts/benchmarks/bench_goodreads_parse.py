@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+RSS page parsing cost of the Goodreads scraper, and output parity between its parsers.
+
+Every page is parsed with the streaming ElementTree parser and with the
+original BeautifulSoup one, the two book lists are checked to be equal,
+and both are timed. Without arguments the recorded shelf page in
+fixtures/ is used; saved RSS pages can be passed instead:
+
+    python3 scripts/benchmarks/bench_goodreads_parse.py
+    python3 scripts/benchmarks/bench_goodreads_parse.py -n 50 read_page1.xml read_page2.xml
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "backup_goodreads_web"))
+
+from goodreads_scraper import PARSERS, parse_books  # noqa: E402
+
+DEFAULT_PAGE = os.path.join(BENCH_DIR, "fixtures", "goodreads_shelf.rss")
+
+
+def timed(parser, xml_content, shelf, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        books = parse_books(xml_content, shelf, parser)
+    return (time.perf_counter() - start) / iterations, books
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark the Goodreads RSS parsers")
+    parser.add_argument("pages", nargs="*", default=[DEFAULT_PAGE], help="saved RSS pages")
+    parser.add_argument("--shelf", default="read", help="shelf the pages were fetched from")
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'page':<28} {'books':>6} " + " ".join(f"{name + ' ms':>10}" for name in PARSERS) + f" {'speedup':>8}")
+    for path in args.pages:
+        with open(path, encoding="utf-8") as f:
+            xml_content = f.read()
+        results = {name: timed(name, xml_content, args.shelf, args.iterations) for name in PARSERS}
+        etree_s, books = results["etree"]
+        if results["bs4"][1] != books:
+            sys.exit(f"❌ {path}: the etree parser's output differs from BeautifulSoup's")
+        timings = " ".join(f"{seconds * 1000:10.2f}" for seconds, _ in results.values())
+        print(f"{os.path.basename(path):<28} {len(books):>6} {timings} {results['bs4'][0] / etree_s:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
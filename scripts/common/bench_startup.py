@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Startup cost of the cron-launched scripts, measured with `python -X importtime`.
+
+Each run imports a script as a module in a fresh interpreter, so module-level
+code runs but its __main__ block does not, and reports the wall clock of the
+whole process, the script's cumulative import time and the self time per
+top-level package:
+
+    python3 scripts/common/bench_startup.py
+    python3 scripts/common/bench_startup.py meteo_data/meteo.py --runs 10 --top 15
+    python3 scripts/common/bench_startup.py --json >> startup.jsonl
+
+With --json one line per script is printed, tagged with the git commit, so
+results can be appended to a file and compared across commits.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = [
+    "meteo_data/meteo.py",
+    "light_outage/power.py",
+    "backup_goodreads_web/goodreads_scraper.py",
+    "backup_imdb_web/imdb_scraper.py",
+]
+
+
+def parse_importtime(stderr):
+    """(self_us, cumulative_us, depth, module) for every line of -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def run_once(args, cwd):
+    start = time.perf_counter()
+    proc = subprocess.run(args, cwd=cwd, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    return wall_ms, proc.stderr
+
+
+def measure(script, runs):
+    path = os.path.join(SCRIPTS_DIR, script)
+    directory, filename = os.path.split(path)
+    module = os.path.splitext(filename)[0]
+    code = f"import sys; sys.path.insert(0, {directory!r}); import {module}"
+
+    walls, imports = [], []
+    packages = defaultdict(float)
+    for _ in range(runs):
+        wall_ms, stderr = run_once([sys.executable, "-X", "importtime", "-c", code], directory)
+        entries = parse_importtime(stderr)
+        walls.append(wall_ms)
+        imports.append(next((c for _, c, d, name in entries if d == 0 and name == module), 0) / 1000)
+        for self_us, _, _, name in entries:
+            packages[name.split(".")[0]] += self_us / 1000 / runs
+
+    return {
+        "script": script,
+        "runs": runs,
+        "wall_ms": round(statistics.median(walls), 1),
+        "import_ms": round(statistics.median(imports), 1),
+        "packages": {name: round(ms, 2) for name, ms in sorted(packages.items(), key=lambda p: -p[1])},
+    }
+
+
+def interpreter_baseline(runs):
+    """Median wall clock of a bare `python -c pass`"""
+    return round(statistics.median(run_once([sys.executable, "-c", "pass"], None)[0] for _ in range(runs)), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import/startup time of the scripts")
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS, help="paths relative to scripts/")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="packages to list per script")
+    parser.add_argument("--json", action="store_true", help="one JSON line per script")
+    args = parser.parse_args()
+
+    baseline = interpreter_baseline(args.runs)
+    commit = git_commit()
+    if not args.json:
+        print(f"Python {sys.version.split()[0]}, bare interpreter {baseline} ms (median of {args.runs})\n")
+
+    for script in args.scripts:
+        try:
+            result = measure(script, args.runs)
+        except RuntimeError as e:
+            print(f"❌ {script}: {e}", file=sys.stderr)
+            continue
+
+        if args.json:
+            result.update(commit=commit, python=sys.version.split()[0], baseline_ms=baseline,
+                          measured_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+            print(json.dumps(result, ensure_ascii=False))
+            continue
+
+        print(f"{script}")
+        print(f"  wall {result['wall_ms']} ms, script imports {result['import_ms']} ms")
+        for name, ms in list(result["packages"].items())[:args.top]:
+            print(f"  {name:<24} {ms:8.2f} ms")
+        print()
+
+
+if __name__ == "__main__":
+    main()
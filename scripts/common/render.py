@@ -0,0 +1,171 @@
+"""
+Precompiled message templates rendered for Telegram Markdown, HTML, Discord or plain text.
+
+A template is str.format syntax plus two markers: **bold** and `code`.
+Each template is parsed once per output channel into literal chunks (with
+markup and escaping already applied) and value slots, so rendering a report
+is a lookup per value and a single join:
+
+    LOCATION = Template("🏠 **{name}**\\n")
+    report = Report().add(LOCATION, name="Slavutych")
+    report.render("html")       # '🏠 <b>Slavutych</b>\\n'
+    report.render("markdown")   # '🏠 *Slavutych*\\n'
+
+Values are escaped for the channel and for where they sit (plain text,
+bold or code), so names and METAR strings containing _, *, ` or < can't
+break the message. None is rendered as "N/A".
+"""
+import html
+import re
+from string import Formatter
+
+MISSING = "N/A"
+
+_formatter = Formatter()
+_MARKER_RE = re.compile(r"(\*\*|`)")
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+TEXT, BOLD, CODE = "text", "bold", "code"
+
+
+class Channel:
+    """Markup and escaping rules of one output format."""
+
+    def __init__(self, name, bold=("", ""), code=("", "")):
+        self.name = name
+        self.bold = bold
+        self.code = code
+
+    def escape(self, text, context):
+        return text
+
+
+class TelegramMarkdown(Channel):
+    """Telegram's legacy Markdown: entities can't be escaped inside, so their closing character is dropped."""
+
+    _TEXT_RE = re.compile(r"([_*`\[])")
+
+    def __init__(self):
+        super().__init__("markdown", bold=("*", "*"), code=("`", "`"))
+
+    def escape(self, text, context):
+        if context == BOLD:
+            return text.replace("*", "")
+        if context == CODE:
+            return text.replace("`", "'")
+        return self._TEXT_RE.sub(r"\\\1", text)
+
+
+class TelegramHTML(Channel):
+    def __init__(self):
+        super().__init__("html", bold=("<b>", "</b>"), code=("<code>", "</code>"))
+
+    def escape(self, text, context):
+        return html.escape(text, quote=False)
+
+
+class DiscordMarkdown(Channel):
+    _TEXT_RE = re.compile(r"([\\*_~`|])")
+
+    def __init__(self):
+        super().__init__("discord", bold=("**", "**"), code=("`", "`"))
+
+    def escape(self, text, context):
+        if context == CODE:
+            return text.replace("`", "'")
+        return self._TEXT_RE.sub(r"\\\1", text)
+
+
+CHANNELS = {channel.name: channel for channel in (
+    TelegramMarkdown(), TelegramHTML(), DiscordMarkdown(), Channel("plain"),
+)}
+
+
+class Template:
+    def __init__(self, source):
+        self.source = source
+        self._compiled = {}
+
+    def _compile(self, channel_name):
+        """Literal strings and (field, simple, spec, conversion, context) slots for one channel."""
+        channel = CHANNELS[channel_name]
+        ops = []
+        context = TEXT
+
+        def literal(text):
+            nonlocal context
+            for piece in _MARKER_RE.split(text):
+                if piece == "**" and context != CODE:
+                    ops.append(channel.bold[context == BOLD])
+                    context = TEXT if context == BOLD else BOLD
+                elif piece == "`" and context != BOLD:
+                    ops.append(channel.code[context == CODE])
+                    context = TEXT if context == CODE else CODE
+                elif piece:
+                    ops.append(channel.escape(piece, context))
+
+        for text, field, spec, conversion in _formatter.parse(self.source):
+            literal(text)
+            if field is not None:
+                ops.append((field, bool(_IDENTIFIER_RE.match(field)), spec, conversion, context))
+        if context != TEXT:
+            raise ValueError(f"Unclosed {context} marker in template {self.source!r}")
+
+        # Merge adjacent literals so rendering touches as few parts as possible
+        merged = []
+        for op in ops:
+            if isinstance(op, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += op
+            elif op != "":
+                merged.append(op)
+        self._compiled[channel_name] = merged
+        return merged
+
+    def parts(self, channel, values):
+        """Rendered pieces, to be joined by the caller."""
+        ops = self._compiled[channel] if channel in self._compiled else self._compile(channel)
+        escape = CHANNELS[channel].escape
+        parts = []
+        for op in ops:
+            if isinstance(op, str):
+                parts.append(op)
+                continue
+            field, simple, spec, conversion, context = op
+            if simple:
+                value = values[field]
+            else:
+                value = _formatter.get_field(field, (), values)[0]
+            if value is None:
+                text = MISSING
+            else:
+                if conversion:
+                    value = _formatter.convert_field(value, conversion)
+                text = format(value, spec)
+            parts.append(escape(text, context))
+        return parts
+
+    def render(self, channel="plain", **values):
+        return "".join(self.parts(channel, values))
+
+
+class Report:
+    """Ordered (template, values) pairs rendered with a single join, once per channel."""
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, template, **values):
+        self.items.append((template, values))
+        return self
+
+    def extend(self, report):
+        self.items.extend(report.items)
+        return self
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def render(self, channel="plain"):
+        if channel not in CHANNELS:
+            raise ValueError(f"Unknown channel {channel!r}, expected one of {', '.join(CHANNELS)}")
+        return "".join([part for template, values in self.items for part in template.parts(channel, values)])
@@ -0,0 +1,69 @@
+"""
+Retrying HTTP sends, shared by the Telegram client and the outage notifier.
+
+send_with_retry calls post() up to MAX_ATTEMPTS times. Network errors and
+5xx responses are retried with exponential backoff, 429 responses after
+the wait the platform asked for (capped at MAX_RETRY_AFTER), and any other
+4xx gives up at once, since retrying won't change the answer.
+"""
+import logging
+import time
+
+from common.startup import lazy_import
+
+requests = lazy_import("requests")
+
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0  # seconds, doubled after each failed attempt
+MAX_RETRY_AFTER = 60
+
+
+def header_retry_after(response):
+    """Seconds from a Retry-After header, or None"""
+    try:
+        return float(response.headers.get("Retry-After", 0)) or None
+    except ValueError:
+        return None
+
+
+def send_with_retry(post, name, log, retry_after=header_retry_after, on_rate_limit=None, recover=None):
+    """Call post() until it returns a 2xx response; True if it did.
+
+    log(level, message) reports retries and failures with logging levels.
+    retry_after(response) reads the wait out of a 429. on_rate_limit(wait)
+    may take over that wait and return the seconds still to sleep (e.g. 0
+    when a pacer delays the next send instead). recover(response) may fix
+    up a rejected request and return True to retry it at once.
+    """
+    delay = BACKOFF_BASE
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            response = post()
+            if response.status_code == 429:
+                wait = min(retry_after(response) or delay, MAX_RETRY_AFTER)
+                log(logging.WARNING, f"{name} rate limited, retrying in {wait:g}s")
+                if on_rate_limit:
+                    wait = on_rate_limit(wait)
+            elif response.status_code >= 500:
+                wait = delay
+                log(logging.WARNING, f"{name} error {response.status_code}, retrying in {wait:g}s")
+            elif response.status_code >= 400 and recover and recover(response):
+                wait = 0
+            else:
+                response.raise_for_status()
+                return True
+        except requests.HTTPError as e:
+            # 4xx other than 429 will not get better by retrying
+            log(logging.ERROR, f"{name} error: {e}")
+            return False
+        except requests.RequestException as e:
+            wait = delay
+            log(logging.WARNING, f"{name} request error: {e}")
+
+        if attempt == MAX_ATTEMPTS:
+            break
+        time.sleep(wait)
+        delay *= 2
+
+    log(logging.ERROR, f"{name} message not sent after {MAX_ATTEMPTS} attempts")
+    return False
@@ -0,0 +1,59 @@
+"""
+Fast startup helpers for the cron-launched scripts.
+
+Each script is a short job started cold by cron or GitHub Actions, so on the
+Raspberry Pi interpreter start-up plus imports is a big share of the run.
+Heavy third-party modules (requests, bs4, pytz, ...) are bound with
+lazy_import and only loaded on first attribute access, and require_env exits
+on missing configuration before any of them is touched.
+
+Scripts import this package by putting their parent directory on sys.path:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from common.startup import lazy_import, require_env
+"""
+import importlib
+import os
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """Bind a module without importing it; already imported modules are returned as-is."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def require_env(*names):
+    """Values of the given environment variables; exits with an error if any is missing or empty."""
+    missing = [name for name in names if not os.environ.get(name)]
+    if missing:
+        print(f"❌ Error: missing required environment variable(s): {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+    return [os.environ[name] for name in names]
@@ -0,0 +1,256 @@
+"""
+Telegram Bot API delivery: splitting, coalescing and per-chat pacing.
+
+Telegram rejects messages over 4096 characters (counted in UTF-16 code
+units) and throttles bots that send more than about one message per second
+to a chat or 30 per second overall. split_message cuts long texts at
+paragraph, line or word boundaries, never inside an HTML tag, an &entity;
+or a Markdown escape, and closes/reopens any bold, italic or code entity
+open at the cut. DeliveryQueue packs several reports into as few messages
+as fit, and TelegramClient sends them paced by a process-wide ChatPacer,
+retrying on 429 (after retry_after), 5xx and network errors through
+common.retry.
+"""
+import logging
+import re
+import threading
+import time
+
+from common.retry import send_with_retry, header_retry_after
+from common.startup import lazy_import
+
+requests = lazy_import("requests")
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096
+
+# Bot API guidance: ~1 message/s per chat, 30 messages/s across all chats
+PER_CHAT_INTERVAL = 1.0
+GLOBAL_INTERVAL = 1 / 30
+
+_HTML_TOKEN_RE = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>")
+_MARKDOWN_TOKEN_RE = re.compile(r"\\.|```|[*_`]", re.S)
+# Constructs a cut must not fall inside
+_HTML_ATOM_RE = re.compile(r"<[^>]*>|&#?[a-zA-Z0-9]+;")
+_MARKDOWN_ATOM_RE = re.compile(r"\\.|```", re.S)
+
+
+def units(text):
+    """Length as Telegram counts it, in UTF-16 code units"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _open_entities(text, parse_mode):
+    """(opening, closing) markup for the entities still open at the end of text"""
+    if parse_mode == "HTML":
+        stack = []
+        for match in _HTML_TOKEN_RE.finditer(text):
+            closing, name = match.group(1), match.group(2).lower()
+            if not closing:
+                stack.append((name, match.group(0)))
+            elif stack and stack[-1][0] == name:
+                stack.pop()
+        return "".join(tag for _, tag in stack), "".join(f"</{name}>" for name, _ in reversed(stack))
+
+    if parse_mode == "Markdown":
+        # Legacy Markdown entities don't nest, and inside one only its own marker counts
+        marker = None
+        for match in _MARKDOWN_TOKEN_RE.finditer(text):
+            token = match.group(0)
+            if token.startswith("\\"):
+                continue
+            if marker is None:
+                marker = token
+            elif token == marker:
+                marker = None
+        return (marker, marker) if marker else ("", "")
+
+    return "", ""
+
+
+def _safe_cut(text, cut, parse_mode):
+    """Move cut back so it doesn't fall inside a tag, &entity;, escape or ``` marker"""
+    atom_re = _HTML_ATOM_RE if parse_mode == "HTML" else _MARKDOWN_ATOM_RE if parse_mode == "Markdown" else None
+    if atom_re is None:
+        return cut
+    for match in atom_re.finditer(text, max(0, cut - 16)):
+        if match.start() >= cut:
+            break
+        if match.start() < cut < match.end():
+            return match.start()
+    # An unterminated tag such as "<b" right before the cut
+    if parse_mode == "HTML":
+        tag_start = text.rfind("<", 0, cut)
+        if tag_start != -1 and text.find(">", tag_start, cut) == -1:
+            return tag_start
+    return cut
+
+
+def _prefix_length(text, budget):
+    """Longest prefix of text that fits in budget UTF-16 units"""
+    if units(text) <= budget:
+        return len(text)
+    used = 0
+    for i, char in enumerate(text):
+        used += 2 if ord(char) > 0xFFFF else 1
+        if used > budget:
+            return i
+    return len(text)
+
+
+def split_message(text, parse_mode=None, limit=MAX_MESSAGE_LENGTH):
+    """Split text into chunks of at most limit units, each with balanced markup"""
+    chunks = []
+    reopen = ""
+    while units(text) > limit:
+        budget = limit
+        while True:
+            window = _prefix_length(text, budget)
+            cut = -1
+            for separator in ("\n\n", "\n", " "):
+                position = text.rfind(separator, 0, window)
+                # Don't take a boundary so early that the chunk is mostly empty
+                if position > len(reopen) + window // 4:
+                    cut = position
+                    break
+            if cut == -1:
+                cut = window
+            # Always make progress, even on a degenerate input such as one huge tag
+            cut = max(_safe_cut(text, cut, parse_mode), len(reopen) + 1)
+            opening, closing = _open_entities(text[:cut], parse_mode)
+            overflow = units(text[:cut] + closing) - limit
+            if overflow <= 0 or budget <= 1:
+                break
+            budget -= overflow
+
+        chunks.append(text[:cut].rstrip() + closing)
+        rest = text[cut:]
+        # Whitespace inside a code block is part of the content
+        in_code = "`" in opening or "<code" in opening or "<pre" in opening
+        text = opening + (rest if in_code else rest.lstrip("\n "))
+        reopen = opening
+    if text.strip():
+        chunks.append(text)
+    return chunks
+
+
+def coalesce(texts, parse_mode=None, limit=MAX_MESSAGE_LENGTH, separator="\n\n"):
+    """Pack texts into as few messages as fit, splitting any that are too long on their own"""
+    messages = []
+    current = ""
+    for text in texts:
+        for piece in split_message(text, parse_mode, limit):
+            if current and units(current + separator + piece) <= limit:
+                current += separator + piece
+            else:
+                if current:
+                    messages.append(current)
+                current = piece
+    if current:
+        messages.append(current)
+    return messages
+
+
+class ChatPacer:
+    """Reserves send slots so each chat, and the bot overall, stays under Telegram's rate limits"""
+
+    def __init__(self, per_chat=PER_CHAT_INTERVAL, overall=GLOBAL_INTERVAL):
+        self.per_chat = per_chat
+        self.overall = overall
+        self._lock = threading.Lock()
+        self._next_chat = {}
+        self._next_any = 0.0
+
+    def wait(self, chat_id):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_chat.get(chat_id, 0.0), self._next_any)
+            self._next_chat[chat_id] = slot + self.per_chat
+            self._next_any = slot + self.overall
+        if slot > now:
+            time.sleep(slot - now)
+
+    def backoff(self, chat_id, seconds):
+        """Push the chat's next slot out after a 429"""
+        with self._lock:
+            self._next_chat[chat_id] = max(self._next_chat.get(chat_id, 0.0), time.monotonic() + seconds)
+
+
+# Shared by every client in the process, since the limits are per bot and chat
+default_pacer = ChatPacer()
+
+
+class TelegramClient:
+    def __init__(self, token, session=None, parse_mode=None, pacer=None):
+        self.token = token
+        self.session = session
+        self.parse_mode = parse_mode
+        self.pacer = pacer or default_pacer
+
+    def send(self, chat_id, text):
+        """Send text, split into as many messages as needed; True if every part was delivered"""
+        for chunk in split_message(text, self.parse_mode):
+            if not self._post(chat_id, chunk):
+                return False
+        return True
+
+    def _post(self, chat_id, text):
+        if self.session is None:
+            self.session = requests.Session()
+        payload = {"chat_id": chat_id, "text": text}
+        if self.parse_mode:
+            payload["parse_mode"] = self.parse_mode
+
+        def post():
+            self.pacer.wait(chat_id)
+            return self.session.post(f"https://api.telegram.org/bot{self.token}/sendMessage", json=payload, timeout=10)
+
+        def on_rate_limit(wait):
+            # The pacer holds back this chat's next slot, which post() waits for
+            self.pacer.backoff(chat_id, wait)
+            return 0
+
+        def recover(response):
+            if response.status_code == 400 and "parse_mode" in payload and "parse entities" in response.text:
+                # Better an unformatted message than none
+                logger.warning("Telegram could not parse the message markup, resending as plain text")
+                payload.pop("parse_mode")
+                return True
+            return False
+
+        return send_with_retry(post, "Telegram", logger.log, retry_after=self._retry_after,
+                               on_rate_limit=on_rate_limit, recover=recover)
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.json()["parameters"]["retry_after"])
+        except Exception:
+            return header_retry_after(response)
+
+
+class DeliveryQueue:
+    """Collects messages for one chat and sends them coalesced on flush()"""
+
+    def __init__(self, client, chat_id, separator="\n\n"):
+        self.client = client
+        self.chat_id = chat_id
+        self.separator = separator
+        self.pending = []
+
+    def put(self, text):
+        self.pending.append(text)
+
+    def flush(self):
+        """Send everything queued; True if all of it was delivered"""
+        messages = coalesce(self.pending, self.client.parse_mode, separator=self.separator)
+        self.pending = []
+        sent = 0
+        for message in messages:
+            # Already within the limit, so each goes out as exactly one request
+            if not self.client.send(self.chat_id, message):
+                break
+            sent += 1
+        logger.info(f"Delivered {sent}/{len(messages)} Telegram message(s)")
+        return sent == len(messages)
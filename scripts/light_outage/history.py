@@ -0,0 +1,156 @@
+"""
+Local SQLite history of parsed outage periods with precomputed aggregates.
+
+Every run replaces the periods of each schedule day it parsed, so periods
+that were cancelled or shifted since the last run stop counting. The daily
+and weekly aggregates of that day and the start-hour counts are rebuilt in
+the same transaction, so summaries are a single row lookup no matter how
+many months of history are stored. Aggregates count overlapping or touching
+periods once, merged the same way OutageTimeline merges them.
+"""
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+
+from timeline import OutageTimeline
+
+DEFAULT_HISTORY_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "outages.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS periods (
+    location    TEXT NOT NULL,
+    start       TEXT NOT NULL,   -- ISO 8601 with UTC offset
+    end         TEXT NOT NULL,
+    day         TEXT NOT NULL,   -- date of the schedule the period is on, YYYY-MM-DD
+    minutes     REAL NOT NULL,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (location, start)
+);
+CREATE TABLE IF NOT EXISTS daily_stats (
+    location        TEXT NOT NULL,
+    day             TEXT NOT NULL,
+    outages         INTEGER NOT NULL,
+    off_minutes     REAL NOT NULL,
+    longest_minutes REAL NOT NULL,
+    PRIMARY KEY (location, day)
+);
+CREATE TABLE IF NOT EXISTS weekly_stats (
+    location        TEXT NOT NULL,
+    week            TEXT NOT NULL,   -- ISO week, YYYY-Www
+    outages         INTEGER NOT NULL,
+    off_minutes     REAL NOT NULL,
+    longest_minutes REAL NOT NULL,
+    PRIMARY KEY (location, week)
+);
+CREATE TABLE IF NOT EXISTS start_hours (
+    location TEXT NOT NULL,
+    hour     INTEGER NOT NULL,
+    count    INTEGER NOT NULL,
+    PRIMARY KEY (location, hour)
+);
+"""
+
+
+def iso_week(day):
+    year, week, _ = date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def week_days(week):
+    """All seven YYYY-MM-DD dates of an ISO week string"""
+    year, week_no = week.split("-W")
+    monday = date.fromisocalendar(int(year), int(week_no), 1)
+    return [(monday + timedelta(days=i)).isoformat() for i in range(7)]
+
+
+class OutageHistory:
+    def __init__(self, path=DEFAULT_HISTORY_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def record(self, location, day, periods):
+        """Store a location's schedule for a YYYY-MM-DD day, as (start, end) datetimes, and refresh its aggregates"""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._connect() as conn:
+            # The page is the whole schedule of the day: whatever is no longer on it was cancelled or shifted
+            conn.execute("DELETE FROM periods WHERE location = ? AND day = ?", (location, day))
+            conn.executemany(
+                "INSERT OR REPLACE INTO periods (location, start, end, day, minutes, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(location, start.isoformat(), end.isoformat(), day, (end - start).total_seconds() / 60, now)
+                 for start, end in periods],
+            )
+            self._refresh_day(conn, location, day)
+            self._refresh_week(conn, location, iso_week(day))
+            self._refresh_start_hours(conn, location)
+
+    def _merged_stats(self, conn, location, days):
+        """(outages, off_minutes, longest_minutes) of the days' periods after merging overlaps"""
+        rows = conn.execute(
+            f"SELECT start, end FROM periods WHERE location = ? AND day IN ({','.join('?' * len(days))})",
+            (location, *days),
+        ).fetchall()
+        timeline = OutageTimeline(
+            {'start_time': '', 'end_time': '',
+             'start': datetime.fromisoformat(start), 'end': datetime.fromisoformat(end)}
+            for start, end in rows
+        )
+        durations = [(o['end'] - o['start']).total_seconds() / 60 for o in timeline]
+        return len(durations), sum(durations), max(durations, default=0)
+
+    def _refresh_day(self, conn, location, day):
+        conn.execute(
+            "INSERT OR REPLACE INTO daily_stats (location, day, outages, off_minutes, longest_minutes) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (location, day, *self._merged_stats(conn, location, [day])),
+        )
+
+    def _refresh_week(self, conn, location, week):
+        # Merged over the whole week, so a period running past midnight into the next day's one counts once
+        conn.execute(
+            "INSERT OR REPLACE INTO weekly_stats (location, week, outages, off_minutes, longest_minutes) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (location, week, *self._merged_stats(conn, location, week_days(week))),
+        )
+
+    def _refresh_start_hours(self, conn, location):
+        conn.execute("DELETE FROM start_hours WHERE location = ?", (location,))
+        # Hour of the local ISO start time, "YYYY-MM-DDTHH:..."
+        conn.execute(
+            "INSERT INTO start_hours (location, hour, count) "
+            "SELECT location, CAST(substr(start, 12, 2) AS INTEGER), COUNT(*) "
+            "FROM periods WHERE location = ? GROUP BY 2",
+            (location,),
+        )
+
+    def day_stats(self, location, day):
+        """{'outages', 'off_minutes', 'longest_minutes'} for a YYYY-MM-DD day, or None"""
+        return self._stats("daily_stats", "day", location, day)
+
+    def week_stats(self, location, week):
+        """Same as day_stats for an ISO week such as '2026-W42'"""
+        return self._stats("weekly_stats", "week", location, week)
+
+    def _stats(self, table, key, location, value):
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT outages, off_minutes, longest_minutes FROM {table} WHERE location = ? AND {key} = ?",
+                (location, value),
+            ).fetchone()
+        if not row:
+            return None
+        return {"outages": row[0], "off_minutes": row[1], "longest_minutes": row[2]}
+
+    def typical_start_hours(self, location, top=3):
+        """Most frequent outage start hours, most common first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT hour FROM start_hours WHERE location = ? ORDER BY count DESC, hour LIMIT ?",
+                (location, top),
+            ).fetchall()
+        return [r[0] for r in rows]
@@ -0,0 +1,140 @@
+"""
+Delivery of outage messages to Telegram and Discord.
+
+Each channel keeps its own pooled requests.Session, so repeated sends reuse
+connections, and Notifier.broadcast delivers to all channels concurrently.
+Messages are common.render Reports, rendered once per channel in its own
+markup (HTML for Telegram, Markdown for Discord).
+Failed sends are retried with exponential backoff by common.retry; on HTTP
+429 the wait comes from the platform's retry_after instead. Telegram goes
+through common.telegram, which also splits messages over 4096 characters
+and paces sends per chat.
+"""
+import logging
+import os
+import sys
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.startup import lazy_import
+from common.render import Report
+from common.retry import send_with_retry, header_retry_after
+from common.telegram import TelegramClient
+
+requests = lazy_import("requests")
+
+LOG_ICONS = {logging.WARNING: "⚠️", logging.ERROR: "❌"}
+
+
+def log(level, message):
+    print(f"{LOG_ICONS.get(level, '')} {message}".lstrip())
+
+
+def pooled_session(pool_size=4):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class Channel(ABC):
+    name = "channel"
+    markup = "plain"
+
+    def __init__(self):
+        self._session = None
+
+    @property
+    def session(self):
+        # Created on first send, so building a Notifier doesn't import requests
+        if self._session is None:
+            self._session = pooled_session()
+        return self._session
+
+    def configured(self):
+        return True
+
+    def render(self, message):
+        return message.render(self.markup) if isinstance(message, Report) else message
+
+    @abstractmethod
+    def send(self, message):
+        """Deliver a Report or pre-rendered text; True if it was delivered"""
+
+
+class TelegramChannel(Channel):
+    name = "Telegram"
+    markup = "html"
+
+    def __init__(self, token, chat_id):
+        super().__init__()
+        self.token = token
+        self.chat_id = chat_id
+
+    def configured(self):
+        if not self.token or not self.chat_id:
+            print("⚠️ Missing Telegram credentials")
+            return False
+        return True
+
+    def send(self, message):
+        # Splitting, per-chat pacing and retries are handled by the shared client
+        client = TelegramClient(self.token, session=self.session, parse_mode="HTML")
+        sent = client.send(self.chat_id, self.render(message))
+        print(f"✓ {self.name} message sent" if sent else f"❌ {self.name} message not sent")
+        return sent
+
+
+class DiscordChannel(Channel):
+    name = "Discord"
+    markup = "discord"
+
+    def __init__(self, webhook_url):
+        super().__init__()
+        self.webhook_url = webhook_url
+
+    def configured(self):
+        if not self.webhook_url:
+            print("⚠️ Discord webhook URL not set, skipping Discord notification")
+            return False
+        return True
+
+    def render(self, message):
+        if isinstance(message, Report):
+            return super().render(message)
+        # Convert Telegram HTML tags (<b>) in pre-rendered text to Discord markdown formatting (**)
+        return message.replace("<b>", "**").replace("</b>", "**")
+
+    def send(self, message):
+        text = self.render(message)
+        sent = send_with_retry(
+            lambda: self.session.post(self.webhook_url, json={"content": text}, timeout=10),
+            self.name, log, retry_after=self.retry_after,
+        )
+        if sent:
+            print(f"✓ {self.name} message sent")
+        return sent
+
+    @staticmethod
+    def retry_after(response):
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+        try:
+            if reset_after:
+                return float(reset_after)
+            return float(response.json()["retry_after"])
+        except Exception:
+            return header_retry_after(response)
+
+
+class Notifier:
+    def __init__(self, channels):
+        self.channels = channels
+        self.pool = ThreadPoolExecutor(max_workers=max(1, len(channels)), thread_name_prefix="notify")
+
+    def broadcast(self, message):
+        """Send a Report (or pre-rendered text) to every configured channel in parallel; returns {channel name: sent}"""
+        active = [c for c in self.channels if c.configured()]
+        futures = {c.name: self.pool.submit(c.send, message) for c in active}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,78 @@
+"""
+Helpers for running power.py as a long-lived watcher (`power.py --daemon`).
+
+AlertScheduler keeps one threading.Timer per (location, outage start, lead)
+and re-syncs them after every poll, so alerts follow schedule changes.
+next_poll_interval decides how long to sleep before the next poll.
+Both take {location: OutageTimeline} as built by power.fetch_all.
+"""
+import threading
+
+
+class AlertScheduler:
+    def __init__(self, send, leads):
+        """send(location, outage, lead_minutes) is called when an alert is due"""
+        self.send = send
+        self.leads = sorted(set(leads), reverse=True)
+        self.timers = {}
+        self._lock = threading.Lock()
+
+    def sync(self, all_outages, now):
+        """Schedule alerts for upcoming outages and drop those no longer in the schedule"""
+        wanted = {}
+        for location, outages in all_outages.items():
+            for outage in outages:
+                for lead in self.leads:
+                    delay = (outage['start'] - now).total_seconds() - lead * 60
+                    if delay > 0:
+                        wanted[(location, outage['start'].isoformat(), lead)] = (delay, location, outage, lead)
+
+        with self._lock:
+            for key in list(self.timers):
+                if key not in wanted:
+                    self.timers.pop(key).cancel()
+
+            for key, (delay, location, outage, lead) in wanted.items():
+                if key in self.timers:
+                    continue
+                timer = threading.Timer(delay, self._fire, args=(key, location, outage, lead))
+                timer.daemon = True
+                self.timers[key] = timer
+                timer.start()
+                print(f"⏰ {location}: alert {lead} min before {outage['start_time']} "
+                      f"(in {int(delay // 60)} min)")
+
+    def _fire(self, key, location, outage, lead):
+        with self._lock:
+            if self.timers.pop(key, None) is None:
+                return
+        try:
+            self.send(location, outage, lead)
+        except Exception as e:
+            print(f"❌ Alert error: {e}")
+
+    def cancel_all(self):
+        with self._lock:
+            for timer in self.timers.values():
+                timer.cancel()
+            self.timers.clear()
+
+
+def next_poll_interval(all_outages, now, previous, changed, min_interval, max_interval):
+    """Seconds until the next poll.
+
+    An unchanged schedule backs off by 1.5x up to max_interval, a change resets
+    to min_interval, and the interval never exceeds a quarter of the time left
+    before the next outage starts, so late schedule changes are still caught.
+    """
+    interval = min_interval if changed else min(previous * 1.5, max_interval)
+
+    upcoming = [
+        (timeline.next(now)['start'] - now).total_seconds()
+        for timeline in all_outages.values()
+        if timeline.next(now)
+    ]
+    if upcoming:
+        interval = min(interval, min(upcoming) / 4)
+
+    return int(max(min_interval, min(interval, max_interval)))
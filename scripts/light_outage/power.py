@@ -1,24 +1,49 @@
 import warnings
 warnings.filterwarnings("ignore")
 
-import os, requests, json, sys
+import os, json, sys, threading, time, queue, argparse, signal
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-import pytz
+
+from schedule_cache import ScheduleCache, DEFAULT_CACHE_FILE, DEFAULT_TTL
+from schedule_parser import parse_period_blocks
+from proxy_tiers import TierScheduler, DEFAULT_STATS_FILE, DEFAULT_COOLDOWN
+from schedule_diff import diff_periods, has_changes
+from notifier import Notifier, TelegramChannel, DiscordChannel
+from timeline import OutageTimeline
+from history import OutageHistory, DEFAULT_HISTORY_DB, iso_week
+from outage_watcher import AlertScheduler, next_poll_interval
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.startup import lazy_import, require_env
+from common.render import Template, Report
+
+requests = lazy_import("requests")
+pytz = lazy_import("pytz")
 
 LOCATION_NAME = os.environ.get("LOCATION_NAME")
 LOCATION_URL = os.environ.get("LOCATION_URL")
+LOCATIONS_FILE = os.environ.get("LOCATIONS_FILE")
+LOCATIONS = os.environ.get("LOCATIONS")
 
-if not LOCATION_NAME or not LOCATION_URL:
-    print("❌ Error: LOCATION_NAME and LOCATION_URL environment variables must be set.")
-    sys.exit(1)
+def load_locations():
+    """Read name/url pairs from LOCATIONS_FILE, LOCATIONS (JSON) or LOCATION_NAME/LOCATION_URL"""
+    raw = None
+    if LOCATIONS_FILE:
+        with open(LOCATIONS_FILE, encoding="utf-8") as f:
+            raw = json.load(f)
+    elif LOCATIONS:
+        raw = json.loads(LOCATIONS)
 
-URLS = [
-    {
-        "name": LOCATION_NAME,
-        "url": LOCATION_URL
-    }
-]
+    if raw is None:
+        if not LOCATION_NAME or not LOCATION_URL:
+            return []
+        return [{"name": LOCATION_NAME, "url": LOCATION_URL}]
+
+    # Accept both [{"name": ..., "url": ...}] and {"name": "url"} forms
+    if isinstance(raw, dict):
+        raw = [{"name": name, "url": url} for name, url in raw.items()]
+    return [{"name": item["name"], "url": item["url"]} for item in raw]
 
 
 BOT_TOKEN = os.environ.get("TG_TOKEN")
@@ -26,115 +51,208 @@ CHAT_ID = os.environ.get("TG_CHAT_ID")
 DISCORD_WEBHOOK_URL = os.environ.get("DISCORD_WEBHOOK_URL")
 SCRAPER_API_KEY = os.environ.get("SCRAPER_API_KEY", "")
 ZENROWS_API_KEY = os.environ.get("ZENROWS_API_KEY", "")
+SCHEDULE_CACHE_FILE = os.environ.get("SCHEDULE_CACHE_FILE", DEFAULT_CACHE_FILE)
+SCHEDULE_CACHE_TTL = int(os.environ.get("SCHEDULE_CACHE_TTL", DEFAULT_TTL))
+PROXY_TIER_STATS_FILE = os.environ.get("PROXY_TIER_STATS_FILE", DEFAULT_STATS_FILE)
+PROXY_TIER_COOLDOWN = int(os.environ.get("PROXY_TIER_COOLDOWN", DEFAULT_COOLDOWN))
+HEDGED_FETCH = os.environ.get("HEDGED_FETCH", "").lower() in ("1", "true", "yes")
+HEDGE_DELAY = float(os.environ.get("HEDGE_DELAY", 5))
+NOTIFY_MODE = os.environ.get("NOTIFY_MODE", "diff")  # diff: only changes, full: whole schedule on change
+HISTORY_DB = os.environ.get("HISTORY_DB", DEFAULT_HISTORY_DB)  # empty string disables the history
+ALERT_LEAD_MINUTES = [int(m) for m in os.environ.get("ALERT_LEAD_MINUTES", "30").split(",") if m.strip()]
+POLL_MIN_INTERVAL = int(os.environ.get("POLL_MIN_INTERVAL", 300))
+POLL_MAX_INTERVAL = int(os.environ.get("POLL_MAX_INTERVAL", 3600))
+MAX_CONCURRENT_FETCHES = int(os.environ.get("MAX_CONCURRENT_FETCHES", 4))
+MAX_PROXY_REQUESTS = int(os.environ.get("MAX_PROXY_REQUESTS", MAX_CONCURRENT_FETCHES))
 
-def send_telegram(msg):
-    if not BOT_TOKEN or not CHAT_ID:
-        print("⚠️ Missing Telegram credentials")
-        return
-    
-    try:
-        response = requests.post(
-            f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage",
-            data={"chat_id": CHAT_ID, "text": msg, "parse_mode": "HTML"},
-            timeout=10
-        )
-        response.raise_for_status()
-        print(f"✓ Telegram message sent")
-    except Exception as e:
-        print(f"Telegram error: {e}")
+# Caps in-flight ScraperAPI/ZenRows requests across all location workers
+proxy_slots = threading.BoundedSemaphore(max(1, MAX_PROXY_REQUESTS))
 
-def send_discord(msg):
-    if not DISCORD_WEBHOOK_URL:
-        print("⚠️ Discord webhook URL not set, skipping Discord notification")
-        return
-    
-    try:
-        # Convert Telegram HTML tags (<b>) to Discord markdown formatting (**)
-        discord_msg = msg.replace("<b>", "**").replace("</b>", "**")
-        
-        response = requests.post(
-            DISCORD_WEBHOOK_URL,
-            json={"content": discord_msg},
-            timeout=10
-        )
-        response.raise_for_status()
-        print(f"✓ Discord message sent")
-    except Exception as e:
-        print(f"Discord error: {e}")
+# Shared state is built on first use, so importing power.py (or a failed env check) loads nothing
+_ukraine_tz = None
+_notifier = None
+_tier_scheduler = None
+_schedule_cache = None
+_history = None
+_state_lock = threading.Lock()
 
-def fetch_with_zenrows(url):
-    if not ZENROWS_API_KEY:
-        print("⚠️ ZenRows API key missing, skipping fallback.")
-        return ""
-    
-    print("🔄 Switching to ZenRows fallback...")
-    proxy_url = "https://api.zenrows.com/v1/"
+def get_timezone():
+    global _ukraine_tz
+    with _state_lock:
+        if _ukraine_tz is None:
+            _ukraine_tz = pytz.timezone('Europe/Kyiv')
+    return _ukraine_tz
+
+def get_notifier():
+    global _notifier
+    with _state_lock:
+        if _notifier is None:
+            _notifier = Notifier([
+                TelegramChannel(BOT_TOKEN, CHAT_ID),
+                DiscordChannel(DISCORD_WEBHOOK_URL),
+            ])
+    return _notifier
+
+def get_tier_scheduler():
+    global _tier_scheduler
+    with _state_lock:
+        if _tier_scheduler is None:
+            _tier_scheduler = TierScheduler(PROXY_TIER_STATS_FILE, PROXY_TIER_COOLDOWN)
+    return _tier_scheduler
+
+def get_schedule_cache():
+    global _schedule_cache
+    with _state_lock:
+        if _schedule_cache is None:
+            _schedule_cache = ScheduleCache(SCHEDULE_CACHE_FILE, SCHEDULE_CACHE_TTL)
+    return _schedule_cache
+
+def get_history():
+    """Open the outage history database once; None if disabled or unavailable"""
+    global _history
+    # Location workers record concurrently
+    with _state_lock:
+        if _history is None and HISTORY_DB:
+            try:
+                _history = OutageHistory(HISTORY_DB)
+            except Exception as e:
+                print(f"⚠️ Outage history unavailable ({HISTORY_DB}): {e}")
+    return _history
+
+def proxy_get(proxy_url, params, timeout):
+    with proxy_slots:
+        return requests.get(proxy_url, params=params, timeout=timeout)
+
+SCRAPER_API_URL = "http://api.scraperapi.com"
+ZENROWS_API_URL = "https://api.zenrows.com/v1/"
+
+def scraperapi_params(url, premium):
+    return {
+        'api_key': SCRAPER_API_KEY,
+        'url': url,
+        'render': 'true' if premium else 'false',
+        'premium': 'true' if premium else 'false',
+        'country_code': 'ua'
+    }
+
+def request_scraperapi_standard(url):
+    print("🛰 Attempting ScraperAPI Standard Request (1 credit)...")
+    return proxy_get(SCRAPER_API_URL, params=scraperapi_params(url, premium=False), timeout=45)
+
+def request_scraperapi_premium(url):
+    print("🚀 Attempting ScraperAPI Premium (JS render)...")
+    return proxy_get(SCRAPER_API_URL, params=scraperapi_params(url, premium=True), timeout=90)
+
+def request_zenrows(url):
+    print("🔄 Attempting ZenRows (JS render)...")
     params = {
         'apikey': ZENROWS_API_KEY,
         'url': url,
         'js_render': 'true',
         'wait_for': '.periods_items',
     }
-    
+    return proxy_get(ZENROWS_API_URL, params=params, timeout=60)
+
+# name: (credits per request, request function, API key it needs)
+PROXY_TIERS = {
+    "scraperapi_standard": (1, request_scraperapi_standard, "SCRAPER_API_KEY"),
+    "scraperapi_premium": (25, request_scraperapi_premium, "SCRAPER_API_KEY"),
+    "zenrows": (5, request_zenrows, "ZENROWS_API_KEY"),
+}
+
+def configured_tiers():
+    keys = {"SCRAPER_API_KEY": SCRAPER_API_KEY, "ZENROWS_API_KEY": ZENROWS_API_KEY}
+    return [(name, cost) for name, (cost, _, key) in PROXY_TIERS.items() if keys[key]]
+
+def try_tier(name, url):
+    """Run one tier and record its outcome; returns (html or None, status)"""
+    cost, request, _ = PROXY_TIERS[name]
+    started = time.monotonic()
+    status = None
+    html = None
     try:
-        res = requests.get(proxy_url, params=params, timeout=60)
-        if res.status_code == 200:
-            print("✅ Success with ZenRows")
-            return res.text
-        else:
-            print(f"❌ ZenRows failed: {res.status_code} {res.text}")
-            return ""
+        res = request(url)
+        status = res.status_code
+        html = res.text
     except Exception as e:
-        print(f"❌ ZenRows request error: {e}")
+        print(f"⚠️ {name} request error: {e}")
+
+    ok = status == 200 and "periods_items" in html
+    get_tier_scheduler().record(name, ok, time.monotonic() - started, cost, status)
+    if ok:
+        print(f"✅ Success with {name}")
+    elif status is not None:
+        print(f"⚠️ {name} failed: {status}")
+    return html, status
+
+
+def fetch_with_proxy(url, skip=()):
+    tiers = [t for t in configured_tiers() if t[0] not in skip]
+    if not tiers and skip:
+        return ""
+    if not tiers:
+        print("⚠️ No SCRAPER_API_KEY or ZENROWS_API_KEY set, cannot fetch.")
         return ""
 
+    # Cheapest tier likely to succeed goes first; recently blocked tiers are skipped
+    fallback = ""
+    for name in get_tier_scheduler().order(tiers):
+        html, status = try_tier(name, url)
+        if status == 200:
+            if "periods_items" in html:
+                return html
+            fallback = html
+    return fallback
 
-def fetch_with_proxy(url):
-    # Try ScraperAPI first
-    if SCRAPER_API_KEY:
-        proxy_url = "http://api.scraperapi.com"
-        
-        # Tier 1: Cheap Attempt
-        print("🛰 Attempting ScraperAPI Standard Request (1 credit)...")
-        cheap_params = {
-            'api_key': SCRAPER_API_KEY,
-            'url': url,
-            'render': 'false',
-            'premium': 'false',
-            'country_code': 'ua'
-        }
-        
-        try:
-            res = requests.get(proxy_url, params=cheap_params, timeout=45)
-            if res.status_code == 200 and "periods_items" in res.text:
-                print("✅ Success with ScraperAPI Standard Request")
-                return res.text
-            elif res.status_code in [403, 429]:
-                 print(f"⚠️ ScraperAPI blocked or quota exceeded: {res.status_code}")
-                 raise Exception("ScraperAPI Quota/Block")
-        except Exception as e:
-            print(f"⚠️ ScraperAPI Standard attempt failed: {e}")
-
-        # Tier 2: Premium Escalation
-        print("🚀 Escalating to ScraperAPI Premium...")
-        premium_params = cheap_params.copy()
-        premium_params.update({
-            'premium': 'true',
-            'render': 'true',
-        })
-        
-        try:
-            res = requests.get(proxy_url, params=premium_params, timeout=90)
-            if res.status_code == 200 and "periods_items" in res.text:
-                 return res.text
-            elif res.status_code in [403, 429]:
-                 print(f"⚠️ ScraperAPI Premium blocked or quota exceeded: {res.status_code}")
-                 raise Exception("ScraperAPI Premium Quota/Block")
-        except Exception as e:
-            print(f"❌ ScraperAPI Premium attempt failed: {e}")
+# Tiers raced in hedged mode, with the delay before each one is fired
+HEDGE_TIERS = ("scraperapi_standard", "zenrows")
+
+def fetch_hedged(url):
+    """Fire ScraperAPI standard, then ZenRows after HEDGE_DELAY, and take the first usable page.
+
+    If ScraperAPI fails before HEDGE_DELAY (say a quick 403 or 500), ZenRows is fired
+    at once. A hedge that has not been fired yet when a winner arrives is cancelled;
+    requests already in flight are abandoned on daemon threads (their outcome is still
+    recorded in the tier stats). If no hedged tier succeeds, the remaining tiers run as usual.
+    """
+    available = dict(configured_tiers())
+    hedges = [name for name in HEDGE_TIERS
+              if name in available and not get_tier_scheduler().is_cooling(name)]
+    if len(hedges) < 2:
+        return fetch_with_proxy(url)
 
-    # Fallback to ZenRows if ScraperAPI failed or is missing
-    return fetch_with_zenrows(url)
+    print(f"🏁 Hedged fetch: {' vs '.join(hedges)} (delay {HEDGE_DELAY:g}s)")
+    results = queue.Queue()
+    winner = threading.Event()
+    # Set when a tier answers, so a waiting hedge fires (or is cancelled) right away instead of after its delay
+    answered = threading.Event()
+
+    def run(name, delay):
+        if delay:
+            answered.wait(delay)
+            if winner.is_set():
+                print(f"✂️ {name} hedge cancelled, already answered")
+                results.put((name, None, None))
+                return
+        html, status = try_tier(name, url)
+        if status == 200 and "periods_items" in html:
+            winner.set()
+        answered.set()
+        results.put((name, html, status))
+
+    for i, name in enumerate(hedges):
+        threading.Thread(target=run, args=(name, i * HEDGE_DELAY), daemon=True).start()
+
+    fallback = ""
+    for _ in hedges:
+        name, html, status = results.get()
+        if status == 200:
+            if "periods_items" in html:
+                print(f"🏆 Hedged fetch won by {name}")
+                return html
+            fallback = html
+
+    return fetch_with_proxy(url, skip=hedges) or fallback
 
 
 def format_time_delta(minutes):
@@ -146,125 +264,310 @@ def format_time_delta(minutes):
     days = hours / 24
     return f"{days:.1f} днів"
 
-ukraine_tz = pytz.timezone('Europe/Kyiv')
-now = datetime.now(ukraine_tz)
+def period_bounds(day, start_time, end_time):
+    """Aware start and end of an "HH:MM" period on the schedule of the given date"""
+    # Make timezone aware BEFORE any comparisons
+    start = get_timezone().localize(datetime.combine(day, datetime.strptime(start_time, "%H:%M").time()))
+    end = get_timezone().localize(datetime.combine(day, datetime.strptime(end_time, "%H:%M").time()))
 
-print(f"Script run at: {now.strftime('%Y-%m-%d %H:%M %Z')}\n")
+    # Handle overnight outages
+    if end <= start:
+        end += timedelta(days=1)
+    return start, end
 
-all_outages = {}
+def build_outages(periods, now):
+    outages = []
+    for start_time, end_time in periods:
+        try:
+            start, end = period_bounds(now.date(), start_time, end_time)
 
-for item in URLS:
-    print(f"Fetching: {item['name']}")
-    
-    try:
-        html = fetch_with_proxy(item["url"])
-        
-        if "Just a moment" in html or len(html) < 1000:
-            print("❌ Blocked or invalid response")
-            all_outages[item["name"]] = []
+            # Move an outage to tomorrow only once it has ended, so one in progress stays current
+            if end < now:
+                start += timedelta(days=1)
+                end += timedelta(days=1)
+
+            outages.append({
+                'start_time': start_time,
+                'end_time': end_time,
+                'start': start,
+                'end': end
+            })
+            print(f"  - {start_time} – {end_time} ({start.strftime('%d.%m %H:%M')})")
+
+        except Exception as e:
+            print(f"  ! Parse error: {e}")
+            import traceback
+            traceback.print_exc()
             continue
-        
-        soup = BeautifulSoup(html, "html.parser")
-        spans = soup.select("div.periods_items > span")
-        print(f"✓ Found {len(spans)} outage periods")
-        
-        outages = []
-        for s in spans:
-            b = s.find_all("b")
-            if len(b) < 2:
-                continue
-            
+    return outages
+
+def record_history(location, blocks, now):
+    """Store each freshly parsed schedule block under its own date: today's first, then tomorrow's"""
+    history = get_history()
+    if not history:
+        return
+    for offset, periods in enumerate(blocks):
+        day = now.date() + timedelta(days=offset)
+        bounds = []
+        for start_time, end_time in periods:
             try:
-                start_time = b[0].text.strip()
-                end_time = b[1].text.strip()
-                
-                # Parse times
-                start_naive = datetime.combine(now.date(), datetime.strptime(start_time, "%H:%M").time())
-                end_naive = datetime.combine(now.date(), datetime.strptime(end_time, "%H:%M").time())
-                
-                # Make timezone aware BEFORE any comparisons
-                start = ukraine_tz.localize(start_naive)
-                end = ukraine_tz.localize(end_naive)
-                
-                # Handle overnight outages
-                if end <= start:
-                    end += timedelta(days=1)
-                
-                # If outage already passed today, move to tomorrow
-                if start < now:
-                    start += timedelta(days=1)
-                    end += timedelta(days=1)
-                
-                outages.append({
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'start': start,
-                    'end': end
-                })
-                print(f"  - {start_time} – {end_time} ({start.strftime('%d.%m %H:%M')})")
-                
-            except Exception as e:
-                print(f"  ! Parse error: {e}")
-                import traceback
-                traceback.print_exc()
+                bounds.append(period_bounds(day, start_time, end_time))
+            except ValueError:
                 continue
-        
-        all_outages[item["name"]] = outages
-        
+        try:
+            history.record(location, day.isoformat(), bounds)
+        except Exception as e:
+            print(f"⚠️ Could not record history for {location}: {e}")
+
+def fetch_location(item, now, max_age=None):
+    """Fetch and parse one location; returns (outages, changes).
+
+    A cached schedule is reused if it is younger than SCHEDULE_CACHE_TTL, or
+    than max_age if that is shorter (the daemon passes its poll interval).
+
+    changes is None when the schedule is unchanged, "new" when there was no
+    previous schedule for this location, otherwise a diff_periods() result.
+    """
+    print(f"Fetching: {item['name']}")
+    cache = get_schedule_cache()
+
+    try:
+        periods = cache.get_fresh(item["url"], max_age)
+        if periods is not None:
+            print(f"✓ {item['name']}: using cached schedule ({len(periods)} periods), skipping fetch")
+            return build_outages(periods, now), None
+
+        html = fetch_hedged(item["url"]) if HEDGED_FETCH else fetch_with_proxy(item["url"])
+
+        if "Just a moment" in html or len(html) < 1000:
+            print(f"❌ {item['name']}: blocked or invalid response")
+            return [], None
+
+        blocks = parse_period_blocks(html)
+        periods = [period for block in blocks for period in block]
+        print(f"✓ {item['name']}: found {len(periods)} outage periods")
+        record_history(item["name"], blocks, now)
+        previous = cache.periods(item["url"])
+        changes = None
+        if cache.store(item["url"], periods):
+            changes = "new" if previous is None else diff_periods(previous, periods)
+            if changes != "new" and not has_changes(changes):
+                changes = None
+        if changes:
+            print(f"🔔 {item['name']}: schedule changed since last fetch")
+        return build_outages(periods, now), changes
+
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ {item['name']}: error: {e}")
         import traceback
         traceback.print_exc()
-        all_outages[item["name"]] = []
+        return [], None
+
+def fetch_all(locations, now, max_age=None):
+    """Fetch every location in parallel; returns ({name: OutageTimeline}, {name: changes} for changed ones)"""
+    # proxy_slots bounds the paid requests in flight across workers
+    workers = max(1, min(MAX_CONCURRENT_FETCHES, len(locations)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda item: fetch_location(item, now, max_age), locations))
 
-print(f"\n{'='*60}")
+    all_outages = {}
+    all_changes = {}
+    for item, (outages, changes) in zip(locations, results):
+        all_outages[item["name"]] = OutageTimeline(outages)
+        if changes:
+            all_changes[item["name"]] = changes
+    return all_outages, all_changes
 
-# Build message
-message_parts = []
-message_parts.append(f"📅 <b>Графік відключень</b>")
-message_parts.append(f"🕐 {now.strftime('%d.%m.%Y %H:%M')}\n")
+# Message lines, see common/render.py for the template syntax
+HEADER = Template("{icon} **{title}**\n🕐 {time}\n\n")
+LOCATION = Template("🏠 **{location}**\n")
+NO_OUTAGES = Template("  ✅ Відключень немає\n")
+NEXT_OUTAGE = Template("  ⚡ Наступне відключення:\n     Через **{delta}**\n     {start} – {end}\n\n")
+ALL_OUTAGES = Template("  📋 Всі відключення:\n")
+OUTAGE = Template("     {start} – {end}{status}\n")
+OFF_NEXT_DAY = Template("  ⏱ Без світла наступну добу: {delta}\n")
+ADDED = Template("  ➕ Додано: {start} – {end}\n")
+REMOVED = Template("  ➖ Скасовано: {start} – {end}\n")
+SHIFTED = Template("  🔁 Змінено: {old_start} – {old_end} → **{start} – {end}**\n")
+WEEK_NO_DATA = Template("  {label}: немає даних\n")
+WEEK_STATS = Template("  {label}: {outages} відкл., **{off}** без світла, найдовше {longest}\n")
+START_HOURS = Template("  Зазвичай починаються о: {hours}\n")
+ALERT = Template("⚠️ **{location}**: відключення через {lead} хв\n     {start} – {end}")
+BLANK = Template("\n")
+
+def build_header(icon, title, now):
+    return Report().add(HEADER, icon=icon, title=title, time=now.strftime('%d.%m.%Y %H:%M'))
+
+def build_location_section(location, outages, now):
+    report = Report().add(LOCATION, location=location)
 
-for location, outages in all_outages.items():
-    message_parts.append(f"🏠 <b>{location}</b>")
-    
     if not outages:
-        message_parts.append("  ✅ Відключень немає\n")
-        continue
-    
-    # Find next outage
-    next_outage = None
-    for outage in sorted(outages, key=lambda x: x['start']):
-        if outage['start'] > now:
-            next_outage = outage
-            break
-    
+        return report.add(NO_OUTAGES).add(BLANK)
+
+    next_outage = outages.next(now)
     if next_outage:
         delta_min = (next_outage['start'] - now).total_seconds() / 60
-        time_str = format_time_delta(delta_min)
-        
-        message_parts.append(f"  ⚡ Наступне відключення:")
-        message_parts.append(f"     Через <b>{time_str}</b>")
-        message_parts.append(f"     {next_outage['start_time']} – {next_outage['end_time']}\n")
-    
+        report.add(NEXT_OUTAGE, delta=format_time_delta(delta_min),
+                   start=next_outage['start_time'], end=next_outage['end_time'])
+
     # Show all outages
-    message_parts.append("  📋 Всі відключення:")
+    current = outages.current(now)
+    report.add(ALL_OUTAGES)
     for outage in outages:
         status = ""
-        if outage['start'] <= now <= outage['end']:
+        if outage is current:
             status = " 🔴 зараз"
         elif outage['start'] < now:
             status = " ✓ пройшло"
-        
-        message_parts.append(f"     {outage['start_time']} – {outage['end_time']}{status}")
-    
-    message_parts.append("")
 
-message = "\n".join(message_parts)
+        report.add(OUTAGE, start=outage['start_time'], end=outage['end_time'], status=status)
+
+    off_minutes = outages.total_minutes(now, now + timedelta(days=1))
+    report.add(OFF_NEXT_DAY, delta=format_time_delta(off_minutes))
+    return report.add(BLANK)
+
+def build_message(all_outages, now):
+    report = build_header("📅", "Графік відключень", now)
+    for location, outages in all_outages.items():
+        report.extend(build_location_section(location, outages, now))
+    return report
+
+def build_changes_message(all_outages, all_changes, now):
+    """Only the locations whose schedule changed, with added/removed/shifted periods"""
+    report = build_header("🔔", "Зміни в графіку відключень", now)
+
+    for location, changes in all_changes.items():
+        if changes == "new":
+            report.extend(build_location_section(location, all_outages[location], now))
+            continue
+
+        report.add(LOCATION, location=location)
+        for start_time, end_time in changes["added"]:
+            report.add(ADDED, start=start_time, end=end_time)
+        for start_time, end_time in changes["removed"]:
+            report.add(REMOVED, start=start_time, end=end_time)
+        for old, new in changes["shifted"]:
+            report.add(SHIFTED, old_start=old[0], old_end=old[1], start=new[0], end=new[1])
+        if not all_outages[location]:
+            report.add(NO_OUTAGES)
+        report.add(BLANK)
+
+    return report
+
+def notify(message):
+    get_notifier().broadcast(message)
+
+def build_summary_message(locations, now):
+    """Weekly outage statistics per location from the history aggregates"""
+    history = get_history()
+    this_week = iso_week(now.date().isoformat())
+    last_week = iso_week((now - timedelta(days=7)).date().isoformat())
+
+    report = build_header("📊", "Статистика відключень", now)
+
+    for item in locations:
+        location = item["name"]
+        report.add(LOCATION, location=location)
+        for label, week in (("Цей тиждень", this_week), ("Минулий тиждень", last_week)):
+            stats = history.week_stats(location, week) if history else None
+            if not stats or not stats["outages"]:
+                report.add(WEEK_NO_DATA, label=label)
+                continue
+            report.add(WEEK_STATS, label=label, outages=stats['outages'],
+                       off=format_time_delta(stats['off_minutes']),
+                       longest=format_time_delta(stats['longest_minutes']))
+        hours = history.typical_start_hours(location) if history else []
+        if hours:
+            report.add(START_HOURS, hours=', '.join(f'{h:02d}:00' for h in hours))
+        report.add(BLANK)
+
+    return report
+
+def run_once(locations, max_age=None):
+    """One fetch → parse → notify cycle; returns the parsed outages per location"""
+    now = datetime.now(get_timezone())
+    print(f"Script run at: {now.strftime('%Y-%m-%d %H:%M %Z')}\n")
+
+    all_outages, all_changes = fetch_all(locations, now, max_age)
+
+    if NOTIFY_MODE == "full":
+        message = build_message(all_outages, now)
+    else:
+        message = build_changes_message(all_outages, all_changes, now)
+
+    print(f"\n{'='*60}")
+    print(message.render("plain"))
+    print(f"{'='*60}\n")
+
+    if all_changes:
+        notify(message)
+    else:
+        print("ℹ️ Schedule unchanged, skipping notifications")
+    return all_outages, bool(all_changes)
+
+def format_alert(location, outage, lead):
+    return Report().add(ALERT, location=location, lead=lead, start=outage['start_time'], end=outage['end_time'])
+
+def run_daemon(locations):
+    """Keep polling on an adaptive interval and fire pre-outage alerts from in-process timers"""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    alerts = AlertScheduler(lambda *args: notify(format_alert(*args)), ALERT_LEAD_MINUTES)
+    interval = POLL_MIN_INTERVAL
+    print(f"👀 Watching {len(locations)} location(s), alerts {ALERT_LEAD_MINUTES} min ahead")
+
+    try:
+        while not stop.is_set():
+            # A cache TTL longer than the poll interval would just replay the last schedule
+            all_outages, changed = run_once(locations, max_age=interval)
+            now = datetime.now(get_timezone())
+            alerts.sync(all_outages, now)
+
+            interval = next_poll_interval(all_outages, now, interval, changed,
+                                          POLL_MIN_INTERVAL, POLL_MAX_INTERVAL)
+            print(f"💤 Next check in {format_time_delta(interval / 60)}")
+            stop.wait(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        alerts.cancel_all()
+        print("✓ Watcher stopped")
+
+def main():
+    global HEDGED_FETCH
+
+    parser = argparse.ArgumentParser(description="Power outage schedule notifier")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running, re-poll adaptively and send alerts before each outage")
+    parser.add_argument("--summary", action="store_true",
+                        help="send weekly statistics from the outage history instead of fetching")
+    parser.add_argument("--hedged", action="store_true", help="race proxy providers (same as HEDGED_FETCH=1)")
+    args = parser.parse_args()
+    HEDGED_FETCH = HEDGED_FETCH or args.hedged
+
+    # Fail before any network (and heavy import) work if the schedule can't be delivered
+    require_env('TG_TOKEN', 'TG_CHAT_ID')
+
+    try:
+        locations = load_locations()
+    except Exception as e:
+        print(f"❌ Error: could not load locations: {e}")
+        sys.exit(1)
 
-print(message)
-print(f"{'='*60}\n")
+    if not locations:
+        print("❌ Error: LOCATION_NAME and LOCATION_URL (or LOCATIONS / LOCATIONS_FILE) environment variables must be set.")
+        sys.exit(1)
 
-send_telegram(message)
-send_discord(message)
+    if args.summary:
+        message = build_summary_message(locations, datetime.now(get_timezone()))
+        print(message.render("plain"))
+        notify(message)
+    elif args.daemon:
+        run_daemon(locations)
+    else:
+        run_once(locations)
+        print("✓ Script completed")
 
-print("✓ Script completed")
+if __name__ == "__main__":
+    main()
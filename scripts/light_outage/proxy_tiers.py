@@ -0,0 +1,95 @@
+"""
+Persisted per-tier statistics and ordering for the proxy fetch chain.
+
+Every attempt records success, latency and cost for its tier. The next run
+tries the tier with the lowest expected cost per successful fetch first and
+skips tiers that recently answered 403/429 until their cooldown expires.
+"""
+import json
+import os
+import threading
+import time
+
+DEFAULT_STATS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "proxy_tiers.json")
+DEFAULT_COOLDOWN = 6 * 3600  # seconds a blocked tier is skipped
+BLOCK_STATUSES = (403, 429)
+
+# Older attempts fade out so a tier that was blocked last week can win again
+DECAY = 0.9
+LATENCY_ALPHA = 0.3
+
+
+class TierScheduler:
+    def __init__(self, path=DEFAULT_STATS_FILE, cooldown=DEFAULT_COOLDOWN):
+        self.path = path
+        self.cooldown = cooldown
+        self.stats = self._load()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable proxy tier stats {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.stats, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def success_rate(self, name):
+        """Laplace-smoothed success probability, 0.5 for a tier never tried"""
+        s = self.stats.get(name, {})
+        return (s.get("successes", 0.0) + 1) / (s.get("attempts", 0.0) + 2)
+
+    def expected_cost(self, name, cost):
+        return cost / self.success_rate(name)
+
+    def is_cooling(self, name, now=None):
+        now = time.time() if now is None else now
+        return self.stats.get(name, {}).get("blocked_until", 0) > now
+
+    def order(self, tiers):
+        """Sort (name, cost) tiers cheapest-likely-to-succeed first, dropping blocked ones.
+
+        If every tier is cooling down the one released soonest is still returned,
+        so a run never ends up with nothing to try.
+        """
+        now = time.time()
+        with self._lock:
+            active = [t for t in tiers if not self.is_cooling(t[0], now)]
+            if not active and tiers:
+                soonest = min(tiers, key=lambda t: self.stats[t[0]].get("blocked_until", 0))
+                return [soonest[0]]
+            active.sort(key=lambda t: (
+                self.expected_cost(t[0], t[1]),
+                self.stats.get(t[0], {}).get("latency", 0.0),
+            ))
+            return [name for name, _ in active]
+
+    def record(self, name, ok, latency, cost, status=None):
+        """Store the outcome of one attempt and persist the stats"""
+        with self._lock:
+            s = self.stats.setdefault(name, {})
+            s["attempts"] = s.get("attempts", 0.0) * DECAY + 1
+            s["successes"] = s.get("successes", 0.0) * DECAY + (1 if ok else 0)
+            prev = s.get("latency")
+            s["latency"] = latency if prev is None else prev + LATENCY_ALPHA * (latency - prev)
+            if ok:
+                s["credits_spent"] = s.get("credits_spent", 0) + cost
+                s.pop("blocked_until", None)
+            elif status in BLOCK_STATUSES:
+                s["blocked_until"] = time.time() + self.cooldown
+                print(f"⏸ {name} blocked ({status}), cooling down for {self.cooldown // 60} min")
+            s["last_status"] = status
+            try:
+                self._save()
+            except OSError as e:
+                print(f"⚠️ Could not write proxy tier stats {self.path}: {e}")
@@ -0,0 +1,82 @@
+"""
+On-disk cache of parsed outage schedules, keyed by location URL.
+
+Each entry keeps the parsed periods, a content hash of those periods and the
+time they were fetched, so a run inside the TTL can skip the proxy request
+entirely and a run outside it can tell whether the schedule actually changed.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "schedule_cache.json")
+DEFAULT_TTL = 1800  # seconds
+
+
+def schedule_hash(periods):
+    """Stable hash of a list of (start_time, end_time) pairs"""
+    payload = json.dumps([list(p) for p in periods], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ScheduleCache:
+    def __init__(self, path=DEFAULT_CACHE_FILE, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.entries = self._load()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable schedule cache {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get_fresh(self, url, max_age=None):
+        """Return cached periods for url if they are younger than the TTL (capped at max_age), else None"""
+        entry = self.entries.get(url)
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        if not entry or ttl <= 0:
+            return None
+        if time.time() - entry.get("fetched_at", 0) > ttl:
+            return None
+        return [tuple(p) for p in entry.get("periods", [])]
+
+    def periods(self, url):
+        """Last stored periods for url regardless of age, or None if never fetched"""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        return [tuple(p) for p in entry.get("periods", [])]
+
+    def store(self, url, periods):
+        """Save freshly parsed periods; returns True if they differ from the cached ones"""
+        new_hash = schedule_hash(periods)
+        with self._lock:
+            old = self.entries.get(url)
+            changed = not old or old.get("hash") != new_hash
+
+            self.entries[url] = {
+                "fetched_at": time.time(),
+                "hash": new_hash,
+                "periods": [list(p) for p in periods],
+            }
+            try:
+                self._save()
+            except OSError as e:
+                print(f"⚠️ Could not write schedule cache {self.path}: {e}")
+        return changed
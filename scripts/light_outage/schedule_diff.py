@@ -0,0 +1,55 @@
+"""
+Interval diff between two parsed schedules.
+
+Periods are (start_time, end_time) "HH:MM" pairs as stored in the schedule
+cache. A removed and an added period that overlap in time are reported as a
+single shifted period rather than as two separate changes.
+"""
+
+
+def to_minutes(period):
+    """('22:00', '02:00') -> (1320, 1560); overnight ends roll into the next day"""
+    start_h, start_m = map(int, period[0].split(":"))
+    end_h, end_m = map(int, period[1].split(":"))
+    start = start_h * 60 + start_m
+    end = end_h * 60 + end_m
+    if end <= start:
+        end += 24 * 60
+    return start, end
+
+
+def _overlap(a, b):
+    (a_start, a_end), (b_start, b_end) = to_minutes(a), to_minutes(b)
+    return min(a_end, b_end) - max(a_start, b_start)
+
+
+def diff_periods(old, new):
+    """Compare two period lists.
+
+    Returns {'added': [...], 'removed': [...], 'shifted': [(old, new), ...]},
+    each sorted by start time; all lists are empty if nothing changed.
+    """
+    old = [tuple(p) for p in old]
+    new = [tuple(p) for p in new]
+    new_set = set(new)
+    old_set = set(old)
+    removed = [p for p in old if p not in new_set]
+    added = [p for p in new if p not in old_set]
+
+    shifted = []
+    for r in list(removed):
+        best = max(added, key=lambda a: _overlap(r, a), default=None)
+        if best is not None and _overlap(r, best) > 0:
+            shifted.append((r, best))
+            removed.remove(r)
+            added.remove(best)
+
+    return {
+        "added": sorted(added, key=to_minutes),
+        "removed": sorted(removed, key=to_minutes),
+        "shifted": sorted(shifted, key=lambda pair: to_minutes(pair[1])),
+    }
+
+
+def has_changes(diff):
+    return bool(diff["added"] or diff["removed"] or diff["shifted"])
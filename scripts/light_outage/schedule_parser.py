@@ -0,0 +1,250 @@
+"""
+Extraction of outage periods from the rendered schedule page.
+
+The page is several hundred KB of JS-rendered HTML, but only the spans
+directly under div.periods_items matter. There is one such block per
+schedule day, today's first and then tomorrow's once it is published, so
+backends return the periods of each block separately. Backends, fastest first:
+
+- selectolax (if installed)
+- lxml (if installed)
+- stream: a html.parser.HTMLParser subclass that starts at the first
+  periods_items div and stops as soon as that block closes
+- bs4: the original BeautifulSoup html.parser tree, kept as the fallback
+
+Run `python schedule_parser.py` to check every available backend against
+BeautifulSoup and the expected periods on the saved pages in fixtures/,
+or `python schedule_parser.py page.html ...` on other saved pages.
+"""
+import glob
+import json
+import os
+import re
+import sys
+from html.parser import HTMLParser
+
+SCHEDULE_PARSER = os.environ.get("SCHEDULE_PARSER", "auto")
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Start tag of a div whose class list contains periods_items
+BLOCK_START_RE = re.compile(r"""<div\b[^>]*\bclass\s*=\s*["'][^"']*\bperiods_items\b""", re.IGNORECASE)
+
+VOID_ELEMENTS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+))
+
+
+def spans_to_periods(spans):
+    """Keep the first two <b> texts of every span that has at least two"""
+    return [(b[0], b[1]) for b in spans if len(b) >= 2]
+
+
+def parse_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return [
+        spans_to_periods([[b.text.strip() for b in s.find_all("b")[:2]]
+                          for s in block.find_all("span", recursive=False)])
+        for block in soup.select("div.periods_items")
+    ]
+
+
+def parse_selectolax(html):
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    return [
+        spans_to_periods([[b.text().strip() for b in s.css("b")[:2]]
+                          for s in block.iter() if s.tag == "span"])
+        for block in tree.css("div.periods_items")
+    ]
+
+
+def parse_lxml(html):
+    import lxml.html
+
+    root = lxml.html.fromstring(html)
+    blocks = root.xpath("//div[contains(concat(' ', normalize-space(@class), ' '), ' periods_items ')]")
+    return [
+        spans_to_periods([[b.text_content().strip() for b in s.iter("b")][:2] for s in block.xpath("./span")])
+        for block in blocks
+    ]
+
+
+class _BlockDone(Exception):
+    pass
+
+
+class PeriodsBlockParser(HTMLParser):
+    """Collects <b> texts of direct span children of one periods_items div.
+
+    Must be fed starting at the div's start tag; raises _BlockDone when it closes.
+    End tags are matched like BeautifulSoup's html.parser tree does: an end
+    tag closes the innermost open element of that name along with anything
+    left open inside it, and an end tag with no open element is ignored.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.in_block = False
+        self.stack = []         # open elements below the periods_items div
+        self.in_span = False    # inside a direct-child span (stack[0])
+        self.open_b = []        # (stack index, text parts) of the open <b> elements in that span
+        self.spans = []         # text parts of each <b>, per span
+
+    def handle_starttag(self, tag, attrs):
+        if not self.in_block:
+            if tag == "div" and "periods_items" in (dict(attrs).get("class") or "").split():
+                self.in_block = True
+            return
+        if tag in VOID_ELEMENTS:
+            return
+        self.stack.append(tag)
+        if tag == "span" and len(self.stack) == 1:
+            self.in_span = True
+            self.spans.append([])
+        elif tag == "b" and self.in_span:
+            # Every <b> in the span counts, nested ones too, in document order like find_all("b")
+            parts = []
+            self.spans[-1].append(parts)
+            self.open_b.append((len(self.stack) - 1, parts))
+
+    def handle_endtag(self, tag):
+        if not self.in_block or tag in VOID_ELEMENTS:
+            return
+        if tag not in self.stack:
+            if tag == "div":
+                # End of the periods_items div itself
+                raise _BlockDone
+            return
+        while True:
+            closed = self.stack.pop()
+            if self.open_b and self.open_b[-1][0] == len(self.stack):
+                self.open_b.pop()
+            if not self.stack:
+                self.in_span = False
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        for _, parts in self.open_b:
+            parts.append(data)
+
+    def periods(self):
+        return spans_to_periods([["".join(parts).strip() for parts in span[:2]] for span in self.spans])
+
+
+def parse_stream(html):
+    blocks = []
+    pos = 0
+    while True:
+        m = BLOCK_START_RE.search(html, pos)
+        if not m:
+            break
+        chunk = html[m.start():]
+        parser = PeriodsBlockParser()
+        try:
+            parser.feed(chunk)
+            parser.close()
+            end = len(html)
+        except _BlockDone:
+            line, col = parser.getpos()
+            # getpos() is relative to the chunk; convert (line, col) back to an offset
+            offset = 0
+            for _ in range(line - 1):
+                offset = chunk.index("\n", offset) + 1
+            end = m.start() + offset + col
+        blocks.append(parser.periods())
+        pos = max(end, m.end())
+    return blocks
+
+
+BACKENDS = {
+    "selectolax": parse_selectolax,
+    "lxml": parse_lxml,
+    "stream": parse_stream,
+    "bs4": parse_bs4,
+}
+
+
+def _importable(module):
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends():
+    names = [name for name, module in (("selectolax", "selectolax.lexbor"), ("lxml", "lxml.html"))
+             if _importable(module)]
+    names.append("stream")
+    if _importable("bs4"):
+        names.append("bs4")
+    return names
+
+
+def parse_period_blocks(html, backend=None):
+    """Return the (start_time, end_time) pairs of each div.periods_items block, one list per schedule day.
+
+    Uses the fastest available backend and falls back to BeautifulSoup if it
+    fails or finds nothing on a page that does contain a periods_items block.
+    """
+    backend = backend or SCHEDULE_PARSER
+    if backend == "auto":
+        backend = available_backends()[0]
+
+    try:
+        blocks = BACKENDS[backend](html)
+        if any(blocks) or backend == "bs4" or "periods_items" not in html:
+            return blocks
+        print(f"⚠️ {backend} parser found no periods, retrying with BeautifulSoup")
+    except ImportError:
+        print(f"⚠️ {backend} parser not installed, using BeautifulSoup")
+    except Exception as e:
+        print(f"⚠️ {backend} parser failed ({e}), using BeautifulSoup")
+    return parse_bs4(html)
+
+
+def parse_periods(html, backend=None):
+    """Return (start_time, end_time) pairs from all div.periods_items blocks, in page order."""
+    return [period for block in parse_period_blocks(html, backend) for period in block]
+
+
+def load_expected(directory=FIXTURES_DIR):
+    """{page file name: expected periods per block} for the saved pages in fixtures/"""
+    try:
+        with open(os.path.join(directory, "expected.json"), encoding="utf-8") as f:
+            return {name: [[tuple(p) for p in block] for block in blocks] for name, blocks in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+
+
+if __name__ == "__main__":
+    import time
+
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    if not paths:
+        print("Usage: python schedule_parser.py [page.html ...]")
+        sys.exit(2)
+    expected = load_expected()
+
+    mismatches = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        print(f"{path} ({len(html) // 1024} KB)")
+        # BeautifulSoup is the reference implementation the others must match
+        reference = parse_bs4(html) if "bs4" in available_backends() else None
+        known = expected.get(os.path.basename(path)) if os.path.dirname(os.path.abspath(path)) == FIXTURES_DIR else None
+        for name in available_backends():
+            started = time.perf_counter()
+            periods = BACKENDS[name](html)
+            elapsed = (time.perf_counter() - started) * 1000
+            same = (reference is None or periods == reference) and (known is None or periods == known)
+            mismatches += not same
+            count = sum(len(block) for block in periods)
+            print(f"  {name:<10} {elapsed:8.2f} ms  {count} periods  {'ok' if same else 'MISMATCH'}")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,70 @@
+"""
+Sorted, merged outage intervals for one location with bisect-based queries.
+
+OutageTimeline takes the outage dicts built by power.build_outages
+({'start_time', 'end_time', 'start', 'end'}), merges overlapping or touching
+periods and answers "current", "next" and "minutes off in a window" in
+O(log n). Iterating it yields the merged outages in start order.
+"""
+from bisect import bisect_left, bisect_right
+
+
+class OutageTimeline:
+    def __init__(self, outages=()):
+        merged = []
+        for outage in sorted(outages, key=lambda o: o['start']):
+            if merged and outage['start'] <= merged[-1]['end']:
+                last = merged[-1]
+                if outage['end'] > last['end']:
+                    merged[-1] = {
+                        'start_time': last['start_time'],
+                        'end_time': outage['end_time'],
+                        'start': last['start'],
+                        'end': outage['end'],
+                    }
+                continue
+            merged.append(dict(outage))
+
+        self.outages = merged
+        self.starts = [o['start'] for o in merged]
+        self.ends = [o['end'] for o in merged]
+        # cumulative[i] = outage minutes in the first i periods
+        self.cumulative = [0.0]
+        for o in merged:
+            self.cumulative.append(self.cumulative[-1] + (o['end'] - o['start']).total_seconds() / 60)
+
+    def __iter__(self):
+        return iter(self.outages)
+
+    def __len__(self):
+        return len(self.outages)
+
+    def current(self, now):
+        """Outage in progress at now (inclusive of both ends), or None"""
+        i = bisect_right(self.starts, now) - 1
+        if i >= 0 and now <= self.ends[i]:
+            return self.outages[i]
+        return None
+
+    def next(self, now):
+        """First outage starting strictly after now, or None"""
+        i = bisect_right(self.starts, now)
+        return self.outages[i] if i < len(self.outages) else None
+
+    def total_minutes(self, window_start, window_end):
+        """Outage minutes overlapping [window_start, window_end]"""
+        if window_end <= window_start or not self.outages:
+            return 0.0
+        # Periods fully or partly inside the window are lo..hi-1
+        lo = bisect_right(self.ends, window_start)
+        hi = bisect_left(self.starts, window_end)
+        if lo >= hi:
+            return 0.0
+
+        total = self.cumulative[hi] - self.cumulative[lo]
+        # Trim the parts of the boundary periods that stick out of the window
+        if self.starts[lo] < window_start:
+            total -= (window_start - self.starts[lo]).total_seconds() / 60
+        if self.ends[hi - 1] > window_end:
+            total -= (self.ends[hi - 1] - window_end).total_seconds() / 60
+        return total
@@ -0,0 +1,113 @@
+"""Vectorized analysis of the Open-Meteo hourly forecast."""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+HOURLY_VARIABLES = "temperature_2m,dew_point_2m,wind_speed_10m,wind_gusts_10m,cloud_cover,cloud_cover_low"
+
+# Flying-window limits
+MAX_WIND_MS = float(os.getenv('FLY_MAX_WIND_MS', 8))
+MIN_CEILING_M = float(os.getenv('FLY_MIN_CEILING_M', 300))
+
+# Low cloud cover at or above this counts as a ceiling (broken or worse)
+CEILING_COVER = 50
+# Cloud base estimate from the temperature/dew point spread, metres per °C
+CLOUD_BASE_PER_DEGREE = 125
+
+
+def _array(np, values: List[Any]):
+    """Load an hourly series once, with missing values as NaN."""
+    return np.array(values, dtype=float)
+
+
+def _stats(np, values, hours) -> Optional[Dict[str, float]]:
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return None
+    stats = {"min": float(np.nanmin(values)), "max": float(np.nanmax(values)), "trend": 0.0}
+    if valid.sum() >= 2:
+        # Least-squares slope per hour
+        stats["trend"] = float(np.polyfit(hours[valid], values[valid], 1)[0])
+    return stats
+
+
+def forecast_now(weather: Dict[str, Any]) -> datetime:
+    """Current time in the forecast's timezone, naive like its hourly times."""
+    offset = weather.get('utc_offset_seconds')
+    if offset is None:
+        # Without the offset, the time of the current block is the best guess
+        current_time = (weather.get('current') or {}).get('time')
+        if current_time:
+            return datetime.fromisoformat(current_time)
+        offset = 0
+    return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=offset)
+
+
+def analyze_hourly(weather: Optional[Dict[str, Any]],
+                   max_wind_ms: float = MAX_WIND_MS,
+                   min_ceiling_m: float = MIN_CEILING_M,
+                   now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """Min/max/trend per variable and flying windows from the current hour on.
+
+    now is a naive time in the forecast's timezone (default: the current
+    time there). Returns None if NumPy is not installed or there is no
+    hourly data left.
+    """
+    if not weather or not weather.get('hourly'):
+        return None
+    try:
+        import numpy as np
+    except ImportError:
+        logger.warning("NumPy not installed, skipping hourly forecast analysis")
+        return None
+
+    hourly = weather['hourly']
+    times = np.array(hourly['time'], dtype='datetime64[m]')
+    # The series starts at midnight; hours before the current one are already past
+    current = np.datetime64((now or forecast_now(weather)).replace(minute=0, second=0, microsecond=0), 'm')
+    first = int(np.searchsorted(times, current))
+    times = times[first:]
+    if times.size == 0:
+        return None
+    n = times.size
+    hours = (times - times[0]).astype('timedelta64[m]').astype(float) / 60
+
+    def series(name):
+        return _array(np, hourly[name])[first:] if name in hourly else np.full(n, np.nan)
+
+    temp = series('temperature_2m')
+    dew = series('dew_point_2m')
+    wind_ms = series('wind_speed_10m') / 3.6
+    gust_ms = series('wind_gusts_10m') / 3.6
+    cloud = series('cloud_cover')
+    cloud_low = series('cloud_cover_low')
+
+    cloud_base_m = (temp - dew) * CLOUD_BASE_PER_DEGREE
+    ceiling_m = np.where(cloud_low >= CEILING_COVER, cloud_base_m, np.inf)
+    ceiling_m[np.isnan(cloud_low)] = np.nan
+
+    # NaN comparisons are False, so hours with missing data never count as flyable
+    flyable = (wind_ms < max_wind_ms) & (np.nan_to_num(gust_ms, nan=0.0) < max_wind_ms * 1.5) \
+        & (ceiling_m >= min_ceiling_m)
+
+    # Start/end indices of consecutive flyable runs
+    edges = np.diff(np.concatenate(([0], flyable.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    windows = [
+        (str(times[s]), str(times[e - 1] + np.timedelta64(1, 'h')))
+        for s, e in zip(starts, ends)
+    ]
+
+    return {
+        "hours": n,
+        "temperature": _stats(np, temp, hours),
+        "wind_ms": _stats(np, wind_ms, hours),
+        "gusts_ms": _stats(np, gust_ms, hours),
+        "cloud_cover": _stats(np, cloud, hours),
+        "flyable_hours": int(flyable.sum()),
+        "windows": windows,
+    }
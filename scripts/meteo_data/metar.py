@@ -0,0 +1,403 @@
+"""
+Single-pass METAR and TAF decoder.
+
+Every whitespace-separated token is classified by one precompiled regex
+(TOKEN_RE) and applied to a typed structure, so decoding is linear in the
+number of tokens. decode_file() bulk-decodes archives with one report per
+line, e.g.:
+
+    python metar.py archive.txt            # summary
+    python metar.py archive.txt --json     # one JSON object per report
+    python metar.py tafs.txt --taf --json
+"""
+import json
+import re
+import sys
+from dataclasses import dataclass, field, asdict
+from typing import Optional, List, Iterator, Union
+
+FEET_TO_M = 0.3048
+INHG_TO_HPA = 33.8639
+SM_TO_M = 1609.344
+
+CLOUD_COVER = {
+    'FEW': 'Few',
+    'SCT': 'Scattered',
+    'BKN': 'Broken',
+    'OVC': 'Overcast',
+}
+
+_WX_PHENOMENA = "DZ|RA|SN|SG|IC|PL|GR|GS|UP|BR|FG|FU|VA|DU|SA|HZ|PY|PO|SQ|FC|SS|DS"
+
+TOKEN_RE = re.compile(r"""
+    (?P<report_type>METAR|SPECI|TAF)
+  | (?P<time>(?P<t_day>\d{2})(?P<t_hour>\d{2})(?P<t_min>\d{2})Z)
+  | (?P<modifier>AUTO|COR|AMD|CNL|NIL)
+  | (?P<validity>(?P<v_from>\d{4})/(?P<v_to>\d{4}))
+  | (?P<wind>(?P<w_dir>\d{3}|VRB|///)(?P<w_speed>P?\d{2,3}|//)(?:G(?P<w_gust>P?\d{2,3}))?(?P<w_unit>KT|MPS|KMH))
+  | (?P<wind_var>(?P<wv_from>\d{3})V(?P<wv_to>\d{3}))
+  | (?P<cavok>CAVOK)
+  | (?P<vis_m>(?P<vm_value>\d{4})(?P<vm_dir>NDV|[NSEW]{1,2})?)
+  | (?P<vis_sm>(?P<vs_prefix>[PM])?(?P<vs_value>\d{1,2}|\d/\d{1,2}|\d{1,2}/\d{1,2})SM)
+  | (?P<rvr>R(?P<r_runway>\d{2}[LCR]?)/(?P<r_low>[PM]?\d{4})(?:V(?P<r_high>[PM]?\d{4}))?(?P<r_unit>FT)?/?(?P<r_trend>[UDN])?)
+  | (?P<cloud>(?P<c_cover>FEW|SCT|BKN|OVC)(?P<c_height>\d{3}|///)(?P<c_type>CB|TCU|///)?)
+  | (?P<vv>VV(?P<vv_height>\d{3}|///))
+  | (?P<sky_clear>CLR|SKC|NSC|NCD)
+  | (?P<temp>(?P<tp_temp>M?\d{2})/(?P<tp_dew>M?\d{2})?)
+  | (?P<qnh>(?P<q_unit>[QA])(?P<q_value>\d{4}))
+  | (?P<nosig>NOSIG)
+  | (?P<nsw>NSW)
+  | (?P<change>BECMG|TEMPO|(?P<prob>PROB[34]0)|FM(?P<fm_time>\d{6}))
+  | (?P<remarks>RMK)
+  | (?P<weather>(?P<wx_recent>RE)?(?P<wx_intensity>[-+]|VC)?(?P<wx_descriptor>MI|PR|BC|DR|BL|SH|TS|FZ)?
+                (?P<wx_phenomena>(?:""" + _WX_PHENOMENA + r""")*))
+""", re.VERBOSE)
+
+STATION_RE = re.compile(r"[A-Z][A-Z0-9]{3}")
+WHOLE_NUMBER_RE = re.compile(r"\d")
+ARCHIVE_PREFIX_RE = re.compile(r"^\d{12}\s+")
+
+
+@dataclass
+class Wind:
+    direction: Optional[int]  # degrees, None for variable (VRB)
+    speed: Optional[int]
+    unit: str
+    gust: Optional[int] = None
+    variable_from: Optional[int] = None
+    variable_to: Optional[int] = None
+
+    @property
+    def speed_ms(self) -> Optional[float]:
+        return _to_ms(self.speed, self.unit)
+
+    @property
+    def gust_ms(self) -> Optional[float]:
+        return _to_ms(self.gust, self.unit)
+
+
+@dataclass
+class CloudLayer:
+    cover: str                       # FEW, SCT, BKN, OVC
+    height_ft: Optional[int]         # None if reported as ///
+    cloud_type: Optional[str] = None  # CB or TCU
+
+    @property
+    def height_m(self) -> Optional[int]:
+        return None if self.height_ft is None else int(self.height_ft * FEET_TO_M)
+
+
+@dataclass
+class RunwayVisualRange:
+    runway: str
+    low: str
+    high: Optional[str] = None
+    unit: str = 'm'
+    trend: Optional[str] = None      # U(p), D(own), N(o change)
+
+
+@dataclass
+class Weather:
+    code: str
+    intensity: Optional[str] = None  # -, +, VC
+    descriptor: Optional[str] = None
+    phenomena: List[str] = field(default_factory=list)
+    recent: bool = False
+
+
+@dataclass
+class Conditions:
+    """Groups shared by METAR reports and TAF forecast periods."""
+    wind: Optional[Wind] = None
+    visibility_m: Optional[float] = None
+    cavok: bool = False
+    weather: List[Weather] = field(default_factory=list)
+    clouds: List[CloudLayer] = field(default_factory=list)
+    vertical_visibility_ft: Optional[int] = None
+    sky_clear: Optional[str] = None  # CLR, SKC, NSC or NCD
+    unparsed: List[str] = field(default_factory=list)
+
+    @property
+    def ceiling_ft(self) -> Optional[int]:
+        """Lowest broken/overcast layer or vertical visibility."""
+        heights = [c.height_ft for c in self.clouds
+                   if c.cover in ('BKN', 'OVC') and c.height_ft is not None]
+        if self.vertical_visibility_ft is not None:
+            heights.append(self.vertical_visibility_ft)
+        return min(heights) if heights else None
+
+
+@dataclass
+class Metar(Conditions):
+    raw: str = ''
+    report_type: str = 'METAR'
+    station: Optional[str] = None
+    day: Optional[int] = None
+    hour: Optional[int] = None
+    minute: Optional[int] = None
+    modifier: Optional[str] = None
+    rvr: List[RunwayVisualRange] = field(default_factory=list)
+    temperature: Optional[int] = None
+    dew_point: Optional[int] = None
+    qnh_hpa: Optional[float] = None
+    nosig: bool = False
+    trend: Optional[str] = None
+    remarks: Optional[str] = None
+
+
+@dataclass
+class TafPeriod(Conditions):
+    change: str = 'BASE'             # BASE, FM, BECMG, TEMPO, PROB30, PROB40, "PROB30 TEMPO"
+    valid_from: Optional[str] = None  # DDHH or DDHHMM for FM groups
+    valid_to: Optional[str] = None
+    nsw: bool = False
+
+
+@dataclass
+class Taf:
+    raw: str = ''
+    station: Optional[str] = None
+    day: Optional[int] = None
+    hour: Optional[int] = None
+    minute: Optional[int] = None
+    modifier: Optional[str] = None
+    valid_from: Optional[str] = None
+    valid_to: Optional[str] = None
+    periods: List[TafPeriod] = field(default_factory=list)
+    remarks: Optional[str] = None
+
+
+def _to_ms(value: Optional[int], unit: str) -> Optional[float]:
+    if value is None:
+        return None
+    if unit == 'KT':
+        return round(value * 0.514444, 1)
+    if unit == 'KMH':
+        return round(value / 3.6, 1)
+    return float(value)
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    if value is None or not value.lstrip('P').isdigit():
+        return None
+    return int(value.lstrip('P'))
+
+
+def _signed(value: str) -> int:
+    return -int(value[1:]) if value.startswith('M') else int(value)
+
+
+def _sm_to_m(value: str, whole: int = 0) -> float:
+    if '/' in value:
+        num, den = value.split('/')
+        miles = whole + int(num) / int(den)
+    else:
+        miles = whole + int(value)
+    return round(miles * SM_TO_M)
+
+
+def tokens(raw: str) -> List[str]:
+    """Split a report into tokens, dropping the trailing '=' and archive timestamps."""
+    raw = ARCHIVE_PREFIX_RE.sub('', raw.strip()).rstrip('=').strip()
+    return raw.split()
+
+
+def _apply_conditions(target: Conditions, kind: str, m: 're.Match', token: str, prev_whole: int) -> bool:
+    """Fill a Conditions group from a classified token; False if kind is not a conditions group."""
+    if kind == 'wind':
+        target.wind = Wind(
+            direction=_int(m['w_dir']),
+            speed=_int(m['w_speed']),
+            unit=m['w_unit'],
+            gust=_int(m['w_gust']),
+        )
+    elif kind == 'wind_var' and target.wind:
+        target.wind.variable_from = int(m['wv_from'])
+        target.wind.variable_to = int(m['wv_to'])
+    elif kind == 'cavok':
+        target.cavok = True
+        target.visibility_m = 10000
+    elif kind == 'vis_m':
+        # Keep the prevailing (first) visibility; directional minima follow it
+        if target.visibility_m is None:
+            target.visibility_m = int(m['vm_value'])
+    elif kind == 'vis_sm':
+        target.visibility_m = _sm_to_m(m['vs_value'], prev_whole)
+    elif kind == 'cloud':
+        target.clouds.append(CloudLayer(
+            cover=m['c_cover'],
+            height_ft=None if m['c_height'] == '///' else int(m['c_height']) * 100,
+            cloud_type=m['c_type'] if m['c_type'] in ('CB', 'TCU') else None,
+        ))
+    elif kind == 'vv':
+        target.vertical_visibility_ft = None if m['vv_height'] == '///' else int(m['vv_height']) * 100
+    elif kind == 'sky_clear':
+        target.sky_clear = token
+    elif kind == 'weather':
+        target.weather.append(Weather(
+            code=token,
+            intensity=m['wx_intensity'],
+            descriptor=m['wx_descriptor'],
+            phenomena=[m['wx_phenomena'][i:i + 2] for i in range(0, len(m['wx_phenomena']), 2)],
+            recent=bool(m['wx_recent']),
+        ))
+    else:
+        return False
+    return True
+
+
+def classify(token: str):
+    """Return (kind, match) for a token, or (None, None) if it is not a known group."""
+    m = TOKEN_RE.fullmatch(token)
+    if not m:
+        return None, None
+    # Each alternative's outer group closes last, so lastgroup names the token kind
+    kind = m.lastgroup
+    if kind == 'weather' and not (m['wx_descriptor'] or m['wx_phenomena']):
+        return None, None
+    return kind, m
+
+
+def decode_metar(raw: str) -> Metar:
+    """Decode a METAR/SPECI report into a Metar structure."""
+    report = Metar(raw=raw.strip())
+    parts = tokens(raw)
+    prev_whole = 0
+    for i, token in enumerate(parts):
+        if token == 'RMK':
+            report.remarks = ' '.join(parts[i + 1:])
+            break
+        if token in ('BECMG', 'TEMPO'):
+            # Trend forecast: keep the raw text, it's not part of the observation
+            rest = ' '.join(parts[i:]).split(' RMK ', 1)
+            report.trend = rest[0]
+            if len(rest) > 1:
+                report.remarks = rest[1]
+            break
+
+        whole = 0
+        if report.station is None and report.day is None and STATION_RE.fullmatch(token):
+            report.station = token
+            continue
+
+        kind, m = classify(token)
+        if kind is None:
+            if WHOLE_NUMBER_RE.fullmatch(token):
+                whole = int(token)  # "1 1/2SM"
+            else:
+                report.unparsed.append(token)
+        elif kind == 'report_type':
+            report.report_type = token
+        elif kind == 'time':
+            report.day, report.hour, report.minute = int(m['t_day']), int(m['t_hour']), int(m['t_min'])
+        elif kind == 'modifier':
+            report.modifier = token
+        elif kind == 'rvr':
+            report.rvr.append(RunwayVisualRange(
+                runway=m['r_runway'],
+                low=m['r_low'],
+                high=m['r_high'],
+                unit='ft' if m['r_unit'] else 'm',
+                trend=m['r_trend'],
+            ))
+        elif kind == 'temp':
+            report.temperature = _signed(m['tp_temp'])
+            report.dew_point = _signed(m['tp_dew']) if m['tp_dew'] else None
+        elif kind == 'qnh':
+            value = int(m['q_value'])
+            report.qnh_hpa = float(value) if m['q_unit'] == 'Q' else round(value / 100 * INHG_TO_HPA, 1)
+        elif kind == 'nosig':
+            report.nosig = True
+        elif not _apply_conditions(report, kind, m, token, prev_whole):
+            report.unparsed.append(token)
+        prev_whole = whole
+    return report
+
+
+def decode_taf(raw: str) -> Taf:
+    """Decode a TAF into its base forecast and change periods."""
+    taf = Taf(raw=raw.strip())
+    parts = tokens(raw)
+    period = TafPeriod()
+    taf.periods.append(period)
+    prev_whole = 0
+    for i, token in enumerate(parts):
+        if token == 'RMK':
+            taf.remarks = ' '.join(parts[i + 1:])
+            break
+
+        whole = 0
+        if taf.station is None and taf.day is None and STATION_RE.fullmatch(token):
+            taf.station = token
+            continue
+
+        kind, m = classify(token)
+        if kind is None:
+            if WHOLE_NUMBER_RE.fullmatch(token):
+                whole = int(token)
+            else:
+                period.unparsed.append(token)
+        elif kind == 'report_type':
+            pass
+        elif kind == 'time':
+            taf.day, taf.hour, taf.minute = int(m['t_day']), int(m['t_hour']), int(m['t_min'])
+        elif kind == 'modifier':
+            taf.modifier = token
+        elif kind == 'validity':
+            if len(taf.periods) == 1 and taf.valid_from is None:
+                taf.valid_from, taf.valid_to = m['v_from'], m['v_to']
+                period.valid_from, period.valid_to = m['v_from'], m['v_to']
+            else:
+                period.valid_from, period.valid_to = m['v_from'], m['v_to']
+        elif kind == 'change':
+            if period.change.startswith('PROB') and token == 'TEMPO' and not period.valid_from:
+                period.change = f"{period.change} TEMPO"
+            else:
+                change = 'FM' if m['fm_time'] else token
+                period = TafPeriod(change=change, valid_from=m['fm_time'])
+                taf.periods.append(period)
+        elif kind == 'nsw':
+            period.nsw = True
+        elif not _apply_conditions(period, kind, m, token, prev_whole):
+            period.unparsed.append(token)
+        prev_whole = whole
+    return taf
+
+
+def decode_file(path: str, taf: bool = False) -> Iterator[Union[Metar, Taf]]:
+    """Decode an archive with one report per line, skipping blank lines."""
+    decode = decode_taf if taf else decode_metar
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.strip():
+                yield decode(line)
+
+
+def main(argv: List[str]) -> int:
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Decode METAR/TAF archives")
+    parser.add_argument('path', help="file with one report per line")
+    parser.add_argument('--taf', action='store_true', help="decode TAFs instead of METARs")
+    parser.add_argument('--json', action='store_true', help="print every decoded report as JSON")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    count = unparsed = 0
+    for report in decode_file(args.path, taf=args.taf):
+        count += 1
+        periods = report.periods if isinstance(report, Taf) else [report]
+        unparsed += sum(bool(p.unparsed) for p in periods)
+        if args.json:
+            print(json.dumps(asdict(report), ensure_ascii=False))
+    elapsed = time.perf_counter() - started
+
+    print(f"Decoded {count} reports in {elapsed:.2f}s "
+          f"({count / elapsed if elapsed else 0:.0f}/s), {unparsed} with unknown groups",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
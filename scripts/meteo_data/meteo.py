@@ -1,15 +1,28 @@
+from __future__ import annotations
+
+import json
 import logging
 import os
-import requests
+import sqlite3
+import sys
+import threading
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from zoneinfo import ZoneInfo
 
-# Configure basic logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from metar import decode_metar, CLOUD_COVER, FEET_TO_M
+from hourly import analyze_hourly, HOURLY_VARIABLES, MAX_WIND_MS, MIN_CEILING_M
+from weather_cache import WeatherCache, DEFAULT_CACHE_FILE, metar_expiry, open_meteo_expiry
+from observations import ObservationStore, DEFAULT_DB_FILE
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.startup import lazy_import, require_env
+from common.render import Template, Report
+from common.telegram import TelegramClient, DeliveryQueue
+
+requests = lazy_import("requests")
+
 logger = logging.getLogger(__name__)
 
 # Constants
@@ -17,49 +30,199 @@ SLAVUTYCH_LAT = 51.5206
 SLAVUTYCH_LON = 30.7569
 SLAVUTYCH_ICAO = "UKRR"
 
-def get_metar_data(icao_code: str) -> Optional[Dict[str, Any]]:
-    """Get METAR data for aviation weather including cloud ceiling."""
+METAR_API_URL = "https://aviationweather.gov/api/data/metar"
+OPEN_METEO_API_URL = "https://api.open-meteo.com/v1/forecast"
+OPEN_METEO_CURRENT = ("temperature_2m,relative_humidity_2m,wind_speed_10m,wind_direction_10m,"
+                      "wind_gusts_10m,cloud_cover,cloud_cover_low,cloud_cover_mid,cloud_cover_high,"
+                      "visibility,pressure_msl")
+
+DEFAULT_LOCATIONS = [
+    {"name": "Slavutych", "lat": SLAVUTYCH_LAT, "lon": SLAVUTYCH_LON, "icao": SLAVUTYCH_ICAO},
+]
+
+# Overall time budget for all weather sources together, in seconds
+FETCH_DEADLINE = float(os.getenv('METEO_FETCH_DEADLINE', 15))
+# Timeout of a single API request, never longer than the deadline
+REQUEST_TIMEOUT = 10.0
+
+# Open-Meteo allows up to 16 forecast days
+FORECAST_DAYS = min(max(int(os.getenv('METEO_FORECAST_DAYS', 1)), 1), 16)
+
+# Empty string disables the cache
+CACHE_FILE = os.getenv('METEO_CACHE_FILE', DEFAULT_CACHE_FILE)
+
+# Empty string disables the observation history
+HISTORY_DB = os.getenv('METEO_HISTORY_DB', DEFAULT_DB_FILE)
+
+# How far from exactly 24h ago a stored observation may be to count as "yesterday"
+YESTERDAY_TOLERANCE = 90 * 60
+
+# Report sections, see common/render.py for the template syntax
+HEADER_TEMPLATE = Template("✈️ **Aviation Weather for {name}{station}**\n📅 {local}\n🌍 {utc}\n━━━━━━━━━━━━━━━━━━━━\n\n")
+TEMPERATURE_TEMPLATE = Template("🌡 Temperature: {temp}°C\n💧 Humidity: {humidity}%\n\n")
+WIND_TEMPLATE = Template("💨 Wind: {speed} m/s from {cardinal} ({direction}°)\n")
+GUSTS_TEMPLATE = Template("💨 Gusts: {gusts} m/s\n")
+BLANK_LINE = Template("\n")
+METAR_CLOUDS_TEMPLATE = Template("☁️ **Clouds from METAR:**\n{clouds}\n\n")
+CLOUD_LAYERS_TEMPLATE = Template("☁️ **Cloud Layers:**\n{layers}\n\n")
+CLOUD_COVER_TEMPLATE = Template("☁️ Total Cloud Cover: {cover}%\n\n")
+VISIBILITY_TEMPLATE = Template("👁 Visibility: {km:.1f} km\n")
+PRESSURE_TEMPLATE = Template("🔽 Pressure: {pressure} hPa\n\n")
+COMPARISON_TEMPLATE = Template("📊 Compared with yesterday: {comparison}\n\n")
+FORECAST_TEMPLATE = Template("📈 **Forecast ({hours}h):**\n{summary}\n\n")
+RAW_METAR_TEMPLATE = Template("📋 Raw METAR:\n`{raw}`")
+NO_DATA_TEMPLATE = Template("\n⚠️ No weather data available from any source.")
+
+_cache: Optional[WeatherCache] = None
+_observations: Optional[ObservationStore] = None
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session for all weather and Telegram requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            _session.mount("https://", adapter)
+    return _session
+
+def get_cache() -> Optional[WeatherCache]:
+    """Shared weather cache, or None when METEO_CACHE_FILE is empty."""
+    global _cache
+    with _session_lock:
+        if _cache is None and CACHE_FILE:
+            _cache = WeatherCache(CACHE_FILE)
+    return _cache
+
+def get_observations() -> Optional[ObservationStore]:
+    """Shared observation history, or None when METEO_HISTORY_DB is empty."""
+    global _observations
+    with _session_lock:
+        if _observations is None and HISTORY_DB:
+            _observations = ObservationStore(HISTORY_DB)
+    return _observations
+
+def load_locations() -> List[Dict[str, Any]]:
+    """Locations from METEO_LOCATIONS_FILE or METEO_LOCATIONS (JSON list of name/lat/lon/icao), else Slavutych."""
+    path = os.getenv('METEO_LOCATIONS_FILE')
+    raw = os.getenv('METEO_LOCATIONS')
+    if path:
+        with open(path, encoding='utf-8') as f:
+            locations = json.load(f)
+    elif raw:
+        locations = json.loads(raw)
+    else:
+        return DEFAULT_LOCATIONS
+
+    return [
+        {
+            "name": loc["name"],
+            "lat": float(loc["lat"]),
+            "lon": float(loc["lon"]),
+            "icao": (loc.get("icao") or "").upper() or None,
+        }
+        for loc in locations
+    ]
+
+def get_metar_batch(icao_codes: List[str], timeout: float = REQUEST_TIMEOUT) -> Dict[str, Dict[str, Any]]:
+    """Get the latest METAR for several stations in one request, keyed by ICAO code."""
+    codes = sorted({code.upper() for code in icao_codes if code})
+    cache = get_cache()
+    result: Dict[str, Dict[str, Any]] = {}
+    for code in codes:
+        cached = cache.fresh(f"metar:{code}") if cache else None
+        if cached:
+            result[code] = cached
+    missing = [code for code in codes if code not in result]
+    if not missing:
+        return result
+
     try:
-        url = "https://aviationweather.gov/api/data/metar"
         params = {
-            "ids": icao_code,
+            "ids": ",".join(missing),
             "format": "json",
             "taf": "false"
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = get_session().get(METAR_API_URL, params=params, timeout=timeout)
         response.raise_for_status()
-        data = response.json()
-        return data[0] if data else None
+        data = response.json() or []
+        # Keep the first (most recent) report per station
+        now = time.time()
+        for report in data:
+            code = report.get('icaoId', '').upper()
+            if code in result:
+                continue
+            result[code] = report
+            if cache:
+                cache.put(f"metar:{code}", report, metar_expiry(report, now))
+        return result
     except requests.RequestException as e:
         logger.error(f"METAR request error: {e}")
-        return None
     except Exception as e:
         logger.exception(f"Unexpected error getting METAR data: {e}")
-        return None
 
-def get_open_meteo_data(lat: float, lon: float) -> Optional[Dict[str, Any]]:
-    """Get detailed weather from Open-Meteo."""
+    # Stale-while-revalidate: fall back to the last known reports
+    for code in missing:
+        stale = cache.stale(f"metar:{code}") if cache else None
+        if stale:
+            logger.warning(f"Using cached METAR for {code}")
+            result[code] = stale
+    return result
+
+def get_metar_data(icao_code: str) -> Optional[Dict[str, Any]]:
+    """Get METAR data for aviation weather including cloud ceiling."""
+    return get_metar_batch([icao_code]).get(icao_code.upper())
+
+def get_open_meteo_batch(coords: List[tuple], timeout: float = REQUEST_TIMEOUT) -> List[Optional[Dict[str, Any]]]:
+    """Get Open-Meteo forecasts for several (lat, lon) pairs in one request, in input order."""
+    if not coords:
+        return []
+    cache = get_cache()
+    # Everything that shapes the response is in the key, so changing the forecast length or variables refetches
+    keys = [f"open-meteo:{lat},{lon}:{FORECAST_DAYS}d:{OPEN_METEO_CURRENT}:{HOURLY_VARIABLES}" for lat, lon in coords]
+    result: List[Optional[Dict[str, Any]]] = [cache.fresh(key) if cache else None for key in keys]
+    missing = [i for i, forecast in enumerate(result) if forecast is None]
+    if not missing:
+        return result
+
     try:
-        url = "https://api.open-meteo.com/v1/forecast"
         params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,wind_direction_10m,"
-                       "wind_gusts_10m,cloud_cover,cloud_cover_low,cloud_cover_mid,cloud_cover_high,"
-                       "visibility,pressure_msl",
-            "hourly": "temperature_2m,wind_speed_10m,cloud_cover",
+            "latitude": ",".join(str(coords[i][0]) for i in missing),
+            "longitude": ",".join(str(coords[i][1]) for i in missing),
+            "current": OPEN_METEO_CURRENT,
+            "hourly": HOURLY_VARIABLES,
             "timezone": "Europe/Kiev",
-            "forecast_days": 1
+            "forecast_days": FORECAST_DAYS
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = get_session().get(OPEN_METEO_API_URL, params=params, timeout=timeout)
         response.raise_for_status()
-        return response.json()
+        data = response.json()
+        # A single coordinate pair returns an object, several return a list
+        forecasts = data if isinstance(data, list) else [data]
+        now = time.time()
+        for i, forecast in zip(missing, forecasts):
+            result[i] = forecast
+            if cache:
+                cache.put(keys[i], forecast, open_meteo_expiry(forecast, now))
+        return result
     except requests.RequestException as e:
         logger.error(f"Open-Meteo request error: {e}")
-        return None
     except Exception as e:
         logger.exception(f"Unexpected error getting Open-Meteo data: {e}")
-        return None
+
+    # Stale-while-revalidate: fall back to the last known forecasts
+    for i in missing:
+        stale = cache.stale(keys[i]) if cache else None
+        if stale:
+            logger.warning(f"Using cached Open-Meteo data for {coords[i]}")
+            result[i] = stale
+    return result
+
+def get_open_meteo_data(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    """Get detailed weather from Open-Meteo."""
+    return get_open_meteo_batch([(lat, lon)])[0]
 
 def format_wind_direction(degrees: Optional[float]) -> str:
     """Convert wind direction to cardinal points."""
@@ -76,33 +239,23 @@ def parse_clouds_from_metar(metar_text: str) -> str:
     if not metar_text:
         return "No cloud data"
     
+    report = decode_metar(metar_text)
     clouds = []
-    # Cloud abbreviations mapping
-    cloud_types = {
-        'FEW': 'Few',
-        'SCT': 'Scattered', 
-        'BKN': 'Broken',
-        'OVC': 'Overcast',
-        'CLR': 'Clear',
-        'SKC': 'Clear'
-    }
+    for layer in report.clouds:
+        if layer.height_ft is None:
+            continue
+        suffix = f" {layer.cloud_type}" if layer.cloud_type else ""
+        clouds.append(f"{CLOUD_COVER[layer.cover]}{suffix}: base {layer.height_m}m ({layer.height_ft}ft)")
     
-    parts = metar_text.split()
-    for part in parts:
-        for cloud_abbr, cloud_name in cloud_types.items():
-            if part.startswith(cloud_abbr):
-                if cloud_abbr in ['CLR', 'SKC']:
-                    return "Clear sky"
-                
-                # Extract altitude (in hundreds of feet)
-                # Example: FEW020 -> 020
-                alt_str = part.replace(cloud_abbr, '')[:3]
-                if alt_str.isdigit():
-                    altitude_ft = int(alt_str) * 100
-                    altitude_m = int(altitude_ft * 0.3048)
-                    clouds.append(f"{cloud_name}: base {altitude_m}m ({altitude_ft}ft)")
+    if report.vertical_visibility_ft is not None:
+        vv_m = int(report.vertical_visibility_ft * FEET_TO_M)
+        clouds.append(f"Sky obscured, vertical visibility {vv_m}m ({report.vertical_visibility_ft}ft)")
     
-    return "\n".join(clouds) if clouds else "No significant clouds"
+    if clouds:
+        return "\n".join(clouds)
+    if report.sky_clear in ('CLR', 'SKC'):
+        return "Clear sky"
+    return "No significant clouds"
 
 def format_cloud_layers(weather: Dict[str, Any]) -> str:
     """Format cloud layers with approximate heights."""
@@ -137,8 +290,85 @@ def format_cloud_layers(weather: Dict[str, Any]) -> str:
     
     return "\n".join(layers)
 
-def create_message(metar: Optional[Dict[str, Any]], weather: Optional[Dict[str, Any]]) -> str:
-    """Format weather data into Telegram message."""
+def format_trend(trend: float, unit: str) -> str:
+    if abs(trend) < 0.05:
+        trend = 0.0
+    arrow = "↑" if trend > 0 else "↓" if trend < 0 else "→"
+    return f"{arrow} {trend:+.1f}{unit}/h"
+
+def format_hourly_analysis(analysis: Dict[str, Any]) -> str:
+    """Forecast summary and flying windows from analyze_hourly()."""
+    lines = []
+    temp = analysis['temperature']
+    if temp:
+        lines.append(f"🌡 {temp['min']:.0f}…{temp['max']:.0f}°C ({format_trend(temp['trend'], '°C')})")
+    wind = analysis['wind_ms']
+    if wind:
+        gusts = analysis['gusts_ms']
+        gust_str = f", gusts up to {gusts['max']:.1f}" if gusts else ""
+        lines.append(f"💨 {wind['min']:.1f}…{wind['max']:.1f} m/s{gust_str} ({format_trend(wind['trend'], ' m/s')})")
+    cloud = analysis['cloud_cover']
+    if cloud:
+        lines.append(f"☁️ {cloud['min']:.0f}…{cloud['max']:.0f}% ({format_trend(cloud['trend'], '%')})")
+
+    lines.append(f"\n🛩 Flying windows (wind < {MAX_WIND_MS:g} m/s, ceiling ≥ {MIN_CEILING_M:g} m):")
+    if not analysis['windows']:
+        lines.append("None in the forecast")
+    for start, end in analysis['windows'][:6]:
+        start_dt, end_dt = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        end_str = end_dt.strftime("%H:%M") if end_dt.date() == start_dt.date() else end_dt.strftime("%d.%m %H:%M")
+        lines.append(f"{start_dt.strftime('%d.%m %H:%M')}–{end_str}")
+    if len(analysis['windows']) > 6:
+        lines.append(f"… and {len(analysis['windows']) - 6} more")
+    return "\n".join(lines)
+
+def record_observations(location: Dict[str, Any], metar: Optional[Dict[str, Any]],
+                        weather: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Persist this run's observations and return the Open-Meteo one from about 24h earlier."""
+    try:
+        store = get_observations()
+        if not store:
+            return None
+        if metar:
+            store.record_metar(metar)
+        if weather:
+            observed = store.record_current(location['name'], weather)
+            if observed is not None:
+                return store.nearest('current', location['name'], observed - 86400, YESTERDAY_TOLERANCE)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not update observation history {HISTORY_DB}: {e}")
+    return None
+
+def format_comparison(weather: Dict[str, Any], yesterday: Dict[str, Any]) -> Optional[str]:
+    """One line of temperature/wind/pressure change since the same time yesterday."""
+    current = weather.get('current') or {}
+    wind_kmh = current.get('wind_speed_10m')
+    today = {
+        'temperature': current.get('temperature_2m'),
+        'wind_speed_ms': round(wind_kmh / 3.6, 1) if isinstance(wind_kmh, (int, float)) else None,
+        'pressure_hpa': current.get('pressure_msl'),
+    }
+    parts = []
+    for key, icon, unit in (('temperature', '🌡', '°C'), ('wind_speed_ms', '💨', ' m/s'), ('pressure_hpa', '🔽', ' hPa')):
+        if today[key] is None or yesterday.get(key) is None:
+            continue
+        delta = today[key] - yesterday[key]
+        if abs(delta) < 0.05:
+            delta = 0.0
+        parts.append(f"{icon} {delta:+.1f}{unit}")
+    return ", ".join(parts) if parts else None
+
+def create_message(metar: Optional[Dict[str, Any]], weather: Optional[Dict[str, Any]],
+                   location: Optional[Dict[str, Any]] = None,
+                   yesterday: Optional[Dict[str, Any]] = None,
+                   channel: str = 'markdown') -> str:
+    """Format weather data into a Telegram message (or 'html'/'discord'/'plain' text)."""
+    return build_report(metar, weather, location, yesterday).render(channel)
+
+def build_report(metar: Optional[Dict[str, Any]], weather: Optional[Dict[str, Any]],
+                 location: Optional[Dict[str, Any]] = None,
+                 yesterday: Optional[Dict[str, Any]] = None) -> Report:
+    """Weather report as templates and values, renderable for any output channel."""
     # Timezones
     kyiv_tz = ZoneInfo("Europe/Kiev")
     utc_tz = ZoneInfo("UTC")
@@ -146,113 +376,148 @@ def create_message(metar: Optional[Dict[str, Any]], weather: Optional[Dict[str,
     now_utc = datetime.now(utc_tz)
     now_local = now_utc.astimezone(kyiv_tz)
     
-    timestamp_utc = now_utc.strftime("%Y-%m-%d %H:%M UTC")
-    timestamp_local = now_local.strftime("%Y-%m-%d %H:%M %Z")
-    
-    msg = f"✈️ **Aviation Weather for Slavutych (METAR: UKRR)**\n"
-    msg += f"📅 {timestamp_local}\n"
-    msg += f"🌍 {timestamp_utc}\n"
-    msg += f"━━━━━━━━━━━━━━━━━━━━\n\n"
-    
-    # Temperature and humidity
-    if weather and 'current' in weather:
-        current = weather['current']
-        temp = current.get('temperature_2m', 'N/A')
-        humidity = current.get('relative_humidity_2m', 'N/A')
-        msg += f"🌡 Temperature: {temp}°C\n"
-        msg += f"💧 Humidity: {humidity}%\n\n"
+    location = location or DEFAULT_LOCATIONS[0]
+    report = Report()
+    report.add(
+        HEADER_TEMPLATE,
+        name=location['name'],
+        station=f" (METAR: {location['icao']})" if location.get('icao') else "",
+        local=now_local.strftime("%Y-%m-%d %H:%M %Z"),
+        utc=now_utc.strftime("%Y-%m-%d %H:%M UTC"),
+    )
     
-    # Wind data in m/s
-    if weather and 'current' in weather:
-        current = weather['current']
-        wind_speed_kmh = current.get('wind_speed_10m', 0)
-        # Convert km/h to m/s
-        wind_speed_ms = round(wind_speed_kmh / 3.6, 1) if isinstance(wind_speed_kmh, (int, float)) else 0
-        wind_dir = current.get('wind_direction_10m', None)
-        wind_gust_kmh = current.get('wind_gusts_10m', None)
-        
-        wind_cardinal = format_wind_direction(wind_dir)
-        msg += f"💨 Wind: {wind_speed_ms} m/s from {wind_cardinal} ({wind_dir}°)\n"
+    current = weather.get('current') if weather else None
+    if current:
+        # Temperature and humidity
+        report.add(TEMPERATURE_TEMPLATE, temp=current.get('temperature_2m'),
+                   humidity=current.get('relative_humidity_2m'))
         
+        # Wind data, converted from km/h to m/s
+        wind_speed_kmh = current.get('wind_speed_10m', 0)
+        wind_dir = current.get('wind_direction_10m')
+        wind_gust_kmh = current.get('wind_gusts_10m')
+        report.add(
+            WIND_TEMPLATE,
+            speed=round(wind_speed_kmh / 3.6, 1) if isinstance(wind_speed_kmh, (int, float)) else 0,
+            cardinal=format_wind_direction(wind_dir),
+            direction=wind_dir,
+        )
         if wind_gust_kmh:
-            wind_gust_ms = round(wind_gust_kmh / 3.6, 1)
-            msg += f"💨 Gusts: {wind_gust_ms} m/s\n"
-        msg += "\n"
+            report.add(GUSTS_TEMPLATE, gusts=round(wind_gust_kmh / 3.6, 1))
+        report.add(BLANK_LINE)
     
     # Cloud data from METAR (base heights)
     if metar:
-        msg += f"☁️ **Clouds from METAR:**\n"
-        clouds = parse_clouds_from_metar(metar.get('rawOb', ''))
-        msg += f"{clouds}\n\n"
+        report.add(METAR_CLOUDS_TEMPLATE, clouds=parse_clouds_from_metar(metar.get('rawOb', '')))
     
     # Cloud layers from Open-Meteo
     if weather:
-        msg += f"☁️ **Cloud Layers:**\n"
-        cloud_layers = format_cloud_layers(weather)
-        msg += f"{cloud_layers}\n\n"
+        report.add(CLOUD_LAYERS_TEMPLATE, layers=format_cloud_layers(weather))
+    
+    if current:
+        # Total cloud cover
+        report.add(CLOUD_COVER_TEMPLATE, cover=current.get('cloud_cover'))
+        
+        # Visibility (in km) and pressure
+        visibility = current.get('visibility')
+        if visibility is not None:
+            report.add(VISIBILITY_TEMPLATE, km=visibility / 1000)
+        report.add(PRESSURE_TEMPLATE, pressure=current.get('pressure_msl'))
     
-    # Total cloud cover
-    if weather and 'current' in weather:
-        cloud_cover = weather['current'].get('cloud_cover', 'N/A')
-        msg += f"☁️ Total Cloud Cover: {cloud_cover}%\n\n"
+    # Change since the same time yesterday
+    comparison = format_comparison(weather, yesterday) if weather and yesterday else None
+    if comparison:
+        report.add(COMPARISON_TEMPLATE, comparison=comparison)
     
-    # Visibility and pressure
-    if weather and 'current' in weather:
-        current = weather['current']
-        visibility = current.get('visibility', 'N/A')
-        pressure = current.get('pressure_msl', 'N/A')
-        if visibility != 'N/A':
-             # Visibility in km
-            msg += f"👁 Visibility: {visibility/1000:.1f} km\n"
-        msg += f"🔽 Pressure: {pressure} hPa\n\n"
+    # Hourly forecast analysis
+    analysis = analyze_hourly(weather)
+    if analysis:
+        report.add(FORECAST_TEMPLATE, hours=analysis['hours'], summary=format_hourly_analysis(analysis))
     
     # Raw METAR
     if metar:
-        msg += f"📋 Raw METAR:\n`{metar.get('rawOb', 'N/A')}`"
+        report.add(RAW_METAR_TEMPLATE, raw=metar.get('rawOb'))
     elif not weather:
-        msg += "\n⚠️ No weather data available from any source."
+        report.add(NO_DATA_TEMPLATE)
 
-    return msg
+    return report
 
-def send_telegram(message: str) -> bool:
-    """Send message to Telegram."""
+def get_telegram_queue() -> Optional[DeliveryQueue]:
+    """Delivery queue for the configured chat, or None if credentials are missing."""
     bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
     chat_id = os.getenv('TELEGRAM_CHAT_ID')
     
     if not bot_token or not chat_id:
         logger.error("Missing Telegram credentials (TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID)")
-        return False
-    
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+        return None
     
-    try:
-        response = requests.post(
-            url,
-            json={
-                'chat_id': chat_id,
-                'text': message,
-                'parse_mode': 'Markdown'
-            },
-            timeout=10
-        )
-        response.raise_for_status()
-        logger.info("Message sent successfully")
-        return True
-    except requests.RequestException as e:
-        logger.error(f"Telegram request error: {e}")
-        return False
-    except Exception as e:
-        logger.exception(f"Unexpected error sending Telegram message: {e}")
+    client = TelegramClient(bot_token, session=get_session(), parse_mode='Markdown')
+    return DeliveryQueue(client, chat_id)
+
+def send_telegram(message: str) -> bool:
+    """Send message to Telegram, split into several if it is over the length limit."""
+    queue = get_telegram_queue()
+    if not queue:
         return False
+    queue.put(message)
+    return queue.flush()
+
+def fetch_sources(sources: Dict[str, Any], deadline: float = FETCH_DEADLINE) -> Dict[str, Any]:
+    """Run source fetchers concurrently and return whatever finished before the deadline.
+
+    sources maps a name to a callable taking the request timeout, which is
+    capped at the deadline; sources that time out or fail are returned as None.
+    """
+    timeout = min(REQUEST_TIMEOUT, deadline)
+    finished: Dict[str, Any] = {}
+
+    def run(name: str, fetch: Any) -> None:
+        try:
+            finished[name] = fetch(timeout)
+        except Exception as e:
+            logger.exception(f"{name} fetch failed: {e}")
+
+    # Daemon threads, so a straggler holds up neither the report nor the interpreter's exit
+    threads = {name: threading.Thread(target=run, args=(name, fetch), name=f"meteo-{name}", daemon=True)
+               for name, fetch in sources.items()}
+    for thread in threads.values():
+        thread.start()
+    end = time.monotonic() + deadline
+    for thread in threads.values():
+        thread.join(max(0.0, end - time.monotonic()))
+
+    results = {}
+    for name, thread in threads.items():
+        if thread.is_alive():
+            logger.warning(f"{name} did not answer within {deadline:g}s, sending report without it")
+            results[name] = None
+        else:
+            results[name] = finished.get(name)
+    return results
 
 def main():
-    logger.info(f"Fetching weather data for Slavutych (nearest METAR: {SLAVUTYCH_ICAO})...")
+    # Fail before any network (and heavy import) work if the report can't be delivered
+    require_env('TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID')
+
+    # Configure basic logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    locations = load_locations()
+    names = ", ".join(loc["name"] for loc in locations)
+    logger.info(f"Fetching weather data for {len(locations)} location(s): {names}...")
     
-    # Get data from both sources
-    metar = get_metar_data(SLAVUTYCH_ICAO)
-    weather = get_open_meteo_data(SLAVUTYCH_LAT, SLAVUTYCH_LON)
+    # One request per source for all locations, both sources in parallel
+    results = fetch_sources({
+        "METAR": lambda timeout: get_metar_batch([loc["icao"] for loc in locations if loc["icao"]], timeout),
+        "Open-Meteo": lambda timeout: get_open_meteo_batch([(loc["lat"], loc["lon"]) for loc in locations], timeout),
+    })
+    metars = results["METAR"] or {}
+    forecasts = results["Open-Meteo"] or [None] * len(locations)
     
-    if not metar and not weather:
+    if not metars and not any(forecasts):
         err_msg = "⚠️ Failed to fetch weather data from ALL sources."
         logger.error(err_msg)
         # Try to notify user about complete failure if possible, 
@@ -260,18 +525,28 @@ def main():
         send_telegram(err_msg)
         return
     
-    if not metar:
-        logger.warning(f"Failed to fetch METAR data for {SLAVUTYCH_ICAO}")
-    if not weather:
-        logger.warning("Failed to fetch Open-Meteo data")
+    # Reports are queued and sent together, packed into as few messages as fit
+    queue = get_telegram_queue()
+    for location, weather in zip(locations, forecasts):
+        metar = metars.get(location["icao"]) if location["icao"] else None
+        if location["icao"] and not metar:
+            logger.warning(f"Failed to fetch METAR data for {location['icao']}")
+        if not weather:
+            logger.warning(f"Failed to fetch Open-Meteo data for {location['name']}")
 
-    # Create and send message
-    message = create_message(metar, weather)
-    
-    # Debug log the message content instead of just print
-    # logger.debug(f"Generated message:\n{message}") 
+        yesterday = record_observations(location, metar, weather)
+
+        # Create and queue message
+        message = create_message(metar, weather, location, yesterday)
+        
+        # Debug log the message content instead of just print
+        # logger.debug(f"Generated message:\n{message}") 
+        
+        if queue:
+            queue.put(message)
     
-    send_telegram(message)
+    if queue:
+        queue.flush()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
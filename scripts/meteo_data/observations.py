@@ -0,0 +1,150 @@
+"""Append-only SQLite time series of METAR and Open-Meteo observations."""
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List
+
+from metar import decode_metar
+
+DEFAULT_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "observations.sqlite3")
+
+# Series name -> (key column, value columns)
+SERIES = {
+    "metar": ("station", ["temperature", "dew_point", "wind_speed_ms", "wind_dir",
+                          "visibility_m", "pressure_hpa", "ceiling_ft"]),
+    "current": ("location", ["temperature", "humidity", "wind_speed_ms", "wind_dir", "wind_gusts_ms",
+                             "cloud_cover", "visibility_m", "pressure_hpa"]),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metar (
+    station       TEXT NOT NULL,
+    time          INTEGER NOT NULL,   -- observation time, unix seconds
+    raw           TEXT NOT NULL,
+    temperature   REAL,
+    dew_point     REAL,
+    wind_speed_ms REAL,
+    wind_dir      REAL,
+    visibility_m  REAL,
+    pressure_hpa  REAL,
+    ceiling_ft    REAL,
+    PRIMARY KEY (station, time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS current (
+    location      TEXT NOT NULL,
+    time          INTEGER NOT NULL,
+    temperature   REAL,
+    humidity      REAL,
+    wind_speed_ms REAL,
+    wind_dir      REAL,
+    wind_gusts_ms REAL,
+    cloud_cover   REAL,
+    visibility_m  REAL,
+    pressure_hpa  REAL,
+    PRIMARY KEY (location, time)
+) WITHOUT ROWID;
+"""
+
+
+def _kmh_to_ms(value: Any) -> Optional[float]:
+    return round(value / 3.6, 1) if isinstance(value, (int, float)) else None
+
+
+class ObservationStore:
+    """One row per (station or location, observation time); re-recording the same observation is a no-op."""
+
+    def __init__(self, path: str = DEFAULT_DB_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record_metar(self, report: Dict[str, Any]) -> Optional[int]:
+        """Store an aviationweather.gov METAR; returns its observation time."""
+        raw = report.get('rawOb')
+        obs_time = report.get('obsTime')
+        if not raw or not isinstance(obs_time, (int, float)):
+            return None
+        decoded = decode_metar(raw)
+        wind = decoded.wind
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO metar VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (decoded.station or report.get('icaoId', '')).upper(),
+                    int(obs_time),
+                    raw,
+                    decoded.temperature,
+                    decoded.dew_point,
+                    wind.speed_ms if wind else None,
+                    wind.direction if wind else None,
+                    decoded.visibility_m,
+                    decoded.qnh_hpa,
+                    decoded.ceiling_ft,
+                ),
+            )
+        return int(obs_time)
+
+    def record_current(self, location: str, forecast: Dict[str, Any]) -> Optional[int]:
+        """Store the Open-Meteo `current` block; returns its time."""
+        current = forecast.get('current') or {}
+        try:
+            offset = timedelta(seconds=forecast.get('utc_offset_seconds', 0))
+            time = int(datetime.fromisoformat(current['time']).replace(tzinfo=timezone(offset)).timestamp())
+        except (KeyError, TypeError, ValueError):
+            return None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO current VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    location,
+                    time,
+                    current.get('temperature_2m'),
+                    current.get('relative_humidity_2m'),
+                    _kmh_to_ms(current.get('wind_speed_10m')),
+                    current.get('wind_direction_10m'),
+                    _kmh_to_ms(current.get('wind_gusts_10m')),
+                    current.get('cloud_cover'),
+                    current.get('visibility'),
+                    current.get('pressure_msl'),
+                ),
+            )
+        return time
+
+    def range(self, series: str, key: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """All rows of a series for one station/location with start <= time < end."""
+        key_column, _ = SERIES[series]
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM {series} WHERE {key_column} = ? AND time >= ? AND time < ? ORDER BY time",
+                (key, start, end),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def downsample(self, series: str, key: str, start: int, end: int, bucket: int,
+                   column: str) -> List[Dict[str, Any]]:
+        """avg/min/max/count of one column per `bucket`-second interval."""
+        key_column, columns = SERIES[series]
+        if column not in columns:
+            raise ValueError(f"Unknown column {column!r} for {series}")
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT (time / ?) * ? AS bucket, AVG({column}) AS avg, MIN({column}) AS min, "
+                f"MAX({column}) AS max, COUNT({column}) AS count "
+                f"FROM {series} WHERE {key_column} = ? AND time >= ? AND time < ? "
+                f"GROUP BY time / ? ORDER BY bucket",
+                (bucket, bucket, key, start, end, bucket),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def nearest(self, series: str, key: str, at: int, tolerance: int) -> Optional[Dict[str, Any]]:
+        """Row closest to `at` within ±tolerance seconds, e.g. the same time yesterday."""
+        rows = self.range(series, key, at - tolerance, at + tolerance + 1)
+        if not rows:
+            return None
+        return min(rows, key=lambda row: abs(row['time'] - at))
@@ -0,0 +1,92 @@
+"""Persistent TTL cache for weather source responses."""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "weather_cache.json")
+
+# Routine METARs are issued every 30-60 minutes
+METAR_INTERVAL = 30 * 60
+# Never treat an entry as fresh for less than this, so a late report doesn't cause refetch storms
+MIN_TTL = 5 * 60
+# How old cached data may be and still be served when a source is down
+MAX_STALE = 6 * 3600
+
+
+def metar_expiry(report: Dict[str, Any], now: float) -> float:
+    """Fresh until the next routine observation is expected."""
+    observed = report.get('obsTime')
+    if not isinstance(observed, (int, float)):
+        return now + MIN_TTL
+    return max(observed + METAR_INTERVAL, now + MIN_TTL)
+
+
+def open_meteo_expiry(forecast: Dict[str, Any], now: float) -> float:
+    """Fresh until the end of the current 15-minute model interval."""
+    current = forecast.get('current') or {}
+    try:
+        local = datetime.fromisoformat(current['time'])
+        offset = timedelta(seconds=forecast.get('utc_offset_seconds', 0))
+        observed = local.replace(tzinfo=timezone(offset)).timestamp()
+        return max(observed + current.get('interval', 900), now + MIN_TTL)
+    except (KeyError, TypeError, ValueError):
+        return now + MIN_TTL
+
+
+class WeatherCache:
+    """JSON file of {key: {"data", "fetched_at", "expires_at"}} entries.
+
+    Keys look like "metar:UKRR" or "open-meteo:51.5206,30.7569".
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, max_stale: float = MAX_STALE):
+        self.path = path
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable weather cache {self.path}: {e}")
+            return {}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def fresh(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached data if it has not expired yet."""
+        entry = self.entries.get(key)
+        if entry and time.time() < entry['expires_at']:
+            return entry['data']
+        return None
+
+    def stale(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached data regardless of expiry, as long as it is within max_stale."""
+        entry = self.entries.get(key)
+        if entry and time.time() - entry['fetched_at'] < self.max_stale:
+            return entry['data']
+        return None
+
+    def put(self, key: str, data: Dict[str, Any], expires_at: float) -> None:
+        with self._lock:
+            self.entries[key] = {"data": data, "fetched_at": time.time(), "expires_at": expires_at}
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Could not write weather cache {self.path}: {e}")